@@ -1,12 +1,30 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 from datetime import datetime
 import pandas as pd
-from io import BytesIO
-import textwrap
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from mongodb_config import get_database
-from ai_summary import summarize_repository, ask_repository, summarize_meeting_description
+from itertools import chain
+from mongodb_config import get_database, database_ready
+from history_snapshot import save_snapshot, load_snapshot
+from save_queue import SaveQueue, QUEUE_FILE
+from notepad_archive import get_entries_collection, migrate_legacy_archive, build_entry, format_entries, fetch_entries_page, fetch_newer_entries, iter_all_entries, format_header, archive_fingerprint, HISTORY_PAGE_SIZE
+from search_index import ensure_search_index, index_entry, search_entries
+from digests import load_digested_history, update_digests_in_background
+from concurrent.futures import as_completed
+from ai_summary import (
+    summarize_repository, ask_repository, summarize_meeting_description, get_digest_summarizer,
+    summarize_repository_async, summarize_meeting_description_async, get_prompt_reports,
+    remember_chat_turn, get_cache_stats,
+)
+from metrics import REGISTRY
+from chat_memory import ChatState
+from pdf_export import build_pdf
+from pdf_cache import PdfCache, pdf_cache_key
+from ata import normalize_meeting, build_ata_markdown, ata_pdf_header, load_meetings, generate_atas_zip
+from archive_search import ensure_text_index, search_archive
+from action_items import (
+    ensure_action_indexes, save_ata_actions, pending_actions, overdue_actions, action_owners,
+    set_action_status, format_actions_table,
+)
 
 # Configuração da Página
 st.set_page_config(
@@ -35,35 +53,529 @@ def local_css():
 local_css()
 
 
-def build_pdf(title, subtitle, body):
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    x_margin = 50
-    y = height - 80
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(x_margin, y, title)
-    y -= 28
-    c.setFont("Helvetica", 10)
-    for line in subtitle.split("\n"):
-        if line.strip():
-            c.drawString(x_margin, y, line)
-            y -= 14
-    y -= 10
-    c.setFont("Helvetica", 11)
-    wrap_width = 100
-    for paragraph in body.split("\n\n"):
-        for line in textwrap.wrap(paragraph, wrap_width):
-            if y < 60:
-                c.showPage()
-                y = height - 80
-                c.setFont("Helvetica", 11)
-            c.drawString(x_margin, y, line)
-            y -= 14
-        y -= 10
-    c.save()
-    buffer.seek(0)
-    return buffer.getvalue()
+@st.cache_resource(show_spinner=False)
+def get_archive_collection():
+    """Coleção de entradas do histórico (índices e migração legada executados uma vez por processo)."""
+    db = get_database()
+    migrate_legacy_archive(db)
+    collection = get_entries_collection(db)
+    ensure_text_index(collection)
+    ensure_search_index(db)
+    return collection
+
+
+def render_ai_output(result):
+    """Exibe a resposta da IA (texto pronto ou gerador de tokens) e retorna o texto final."""
+    if isinstance(result, str):
+        st.markdown(result)
+        return result
+    return st.write_stream(result)
+
+
+@st.cache_resource(show_spinner=False)
+def get_actions_database():
+    """Base de dados das atas/ações (índices criados uma vez por processo)."""
+    db = get_database()
+    ensure_action_indexes(db)
+    return db
+
+
+def load_history_page(collection):
+    """Carrega a próxima página (mais antiga) do histórico e a acumula na sessão."""
+    loaded = st.session_state.setdefault("history_entries", [])
+    page, has_more = fetch_entries_page(collection, before=loaded[-1] if loaded else None)
+    if not loaded:
+        save_snapshot(page) # Cópia local das mais recentes, para o modo somente leitura
+        # Cursor das entradas novas: a mais recente vinda do banco (não os saves desta sessão)
+        st.session_state.history_newest = page[0] if page else None
+    loaded.extend(page)
+    st.session_state.history_has_more = has_more
+
+
+def refresh_history(collection):
+    """Acrescenta ao topo do histórico as entradas gravadas (por qualquer sessão) depois da mais recente já carregada."""
+    newest = st.session_state.get("history_newest")
+    if newest is None:
+        newer, complete = fetch_entries_page(collection)[0], True
+    else:
+        newer, complete = fetch_newer_entries(collection, newest)
+    if not complete:
+        # Muitas entradas novas: recomeça pela primeira página
+        st.session_state.pop("history_entries", None)
+        load_history_page(collection)
+        return
+    if not newer:
+        return
+    loaded = st.session_state.history_entries
+    known = {entry["_id"] for entry in loaded}
+    loaded = [entry for entry in newer if entry["_id"] not in known] + loaded
+    loaded.sort(key=lambda entry: (entry["timestamp"], entry["_id"]), reverse=True)
+    st.session_state.history_entries = loaded
+    st.session_state.history_newest = newer[0]
+    save_snapshot(loaded[:HISTORY_PAGE_SIZE])
+
+
+@st.cache_resource(show_spinner=False)
+def get_pdf_cache():
+    """Cache de PDFs compartilhado pelo processo (memória + disco)."""
+    return PdfCache()
+
+
+def cached_pdf(title, subtitle, body, key_body=None, stamped=False):
+    """
+    Retorna o PDF do cache ou o gera uma única vez.
+
+    key_body permite identificar corpos lidos sob demanda (ex.: o histórico) sem consumi-los.
+    Com stamped=True, o subtítulo ganha a linha "Gerado em" no momento da geração; ela fica
+    fora da chave, para que o mesmo conteúdo não seja gerado de novo a cada minuto.
+    """
+    key = pdf_cache_key(title, subtitle, body if key_body is None else key_body)
+
+    def build():
+        rendered_subtitle = subtitle
+        if stamped:
+            rendered_subtitle = f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}\n{subtitle}"
+        return build_pdf(title, rendered_subtitle, body)
+
+    return get_pdf_cache().get_or_build(key, build)
+
+
+def iter_history_lines(collection):
+    """Linhas do histórico completo, lidas do banco à medida que o PDF é desenhado."""
+    if collection is None:
+        yield "Sem conexão."
+        return
+    empty = True
+    for entry in iter_all_entries(collection):
+        empty = False
+        yield format_header(entry)
+        yield entry["body"]
+        yield ""
+    if empty:
+        yield "(Histórico vazio)"
+
+
+def snapshot_history():
+    """Entradas recentes da cópia local (usadas enquanto o banco está fora do ar)."""
+    entries, _ = load_snapshot()
+    return format_entries(reversed(entries)) or "Sem conexão."
+
+
+def get_digested_history(db):
+    """Histórico compacto para o resumo do repositório: digests pré-calculados + entradas ainda não resumidas."""
+    if db is None:
+        return snapshot_history()
+    return format_entries(load_digested_history(db)) or "(Histórico vazio)"
+
+
+def refresh_digests(db):
+    """Atualiza os digests em segundo plano logo após um save."""
+    summarizer = get_digest_summarizer()
+    if summarizer is not None:
+        update_digests_in_background(db, summarizer)
+
+
+def on_entries_flushed(entries):
+    """Indexa as entradas que a fila acabou de gravar no MongoDB e atualiza os digests."""
+    db = get_database()
+    for entry in entries:
+        index_entry(db, entry)
+    refresh_digests(db)
+
+
+@st.cache_resource(show_spinner=False, on_release=lambda queue: queue.close())
+def get_save_queue():
+    """Fila local de saves do processo (enviada ao MongoDB em segundo plano)."""
+    return SaveQueue(get_archive_collection, on_flushed=on_entries_flushed)
+
+
+def with_pending(entries, pending):
+    """Entradas exibidas (mais recentes primeiro) acrescidas das que ainda estão na fila local."""
+    shown = {entry["_id"] for entry in entries}
+    return [entry for entry in pending if entry["_id"] not in shown] + list(entries)
+
+
+def get_relevant_history(db, collection, query):
+    """Histórico restrito às entradas relevantes para a consulta (índice invertido), ou às mais recentes."""
+    if db is None or collection is None:
+        return snapshot_history()
+    entries = search_entries(db, query)
+    if not entries:
+        entries, _ = fetch_entries_page(collection)
+    entries.sort(key=lambda e: (e["timestamp"], e["_id"]))
+    return format_entries(entries) or "(Histórico vazio)"
+
+
+def render_prompt_tokens(operation):
+    """Legenda com os tokens do último prompt da operação, por seção."""
+    report = get_prompt_reports().get(operation)
+    if report:
+        sections = " · ".join(f"{name} {tokens}" for name, tokens in report.items() if name != "prompt")
+        st.caption(f"Prompt: {report['prompt']} tokens ({sections})")
+
+
+def render_ai_futures(futures):
+    """
+    Exibe análises disparadas em paralelo, cada uma assim que fica pronta.
+
+    Args:
+        futures (dict[str, Future]): Título da seção -> resultado em andamento.
+
+    Returns:
+        dict[str, str]: Título -> texto gerado.
+    """
+    placeholders = {}
+    for label in futures:
+        st.markdown(f"#### {label}")
+        placeholders[label] = st.empty()
+        placeholders[label].info("⏳ Gerando...")
+
+    labels = {future: label for label, future in futures.items()}
+    results = {}
+    for future in as_completed(labels):
+        label = labels[future]
+        try:
+            results[label] = future.result()
+        except Exception as e:
+            results[label] = f"Erro ao comunicar com a IA: {str(e)}"
+        placeholders[label].markdown(results[label])
+    return results
+
+
+def metrics_panel_enabled():
+    """O painel de desempenho só aparece quando habilitado nos secrets ([admin] metrics_panel = true)."""
+    try:
+        return bool(st.secrets["admin"]["metrics_panel"])
+    except Exception:
+        return False
+
+
+def render_metrics_panel():
+    """Latência, volume e cache de cada operação desde o início do processo (ou do último reset)."""
+    snapshot = REGISTRY.snapshot()
+    if not snapshot:
+        st.caption("Nenhuma operação medida ainda.")
+    else:
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "Operação": operation,
+                    "Chamadas": stats["count"],
+                    "Erros": stats["errors"],
+                    "p50 (ms)": round(stats["p50_seconds"] * 1000, 1),
+                    "p95 (ms)": round(stats["p95_seconds"] * 1000, 1),
+                    "Máx (ms)": round(stats["max_seconds"] * 1000, 1),
+                    "Tokens entrada": stats["tokens_in"],
+                    "Tokens saída": stats["tokens_out"],
+                    "Cache hits": stats["cache_hits"],
+                    "Cache misses": stats["cache_misses"],
+                }
+                for operation, stats in snapshot.items()
+            ]),
+            hide_index=True,
+            use_container_width=True,
+        )
+    cache_stats = get_cache_stats()
+    st.caption(f"Cache de respostas da IA: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+
+    stamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
+    st.download_button("📥 Exportar JSON", REGISTRY.to_json(), file_name=f"metricas_{stamp}.json", mime="application/json")
+    st.download_button("📥 Exportar Prometheus", REGISTRY.to_prometheus(), file_name=f"metricas_{stamp}.prom", mime="text/plain")
+    if st.button("🔄 Zerar métricas"):
+        REGISTRY.reset()
+        st.rerun()
+
+
+def rerun_panel():
+    """Reexecuta só o painel (fragmento) atual; durante uma execução completa da página, reexecuta a página."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
+@st.fragment
+def archive_input_panel(read_only):
+    """Entrada de novas notas no arquivo. Só o save reexecuta a página toda, para o histórico exibir a nova entrada."""
+    if "new_archive_input" not in st.session_state:
+        st.session_state.new_archive_input = ""
+
+    if st.session_state.get("copy_from_notes", False):
+        if "notepad_notes" in st.session_state and st.session_state.notepad_notes:
+            st.session_state.new_archive_input = st.session_state.notepad_notes
+        st.session_state.copy_from_notes = False
+
+    with st.container(border=True):
+        st.markdown("**Adicionar ao Arquivo**")
+        new_archive_input = st.text_area(
+            "Nova nota:",
+            height=100,
+            key="new_archive_input",
+            placeholder="Digite ou copie aqui...",
+            label_visibility="collapsed"
+        )
+
+        c_btn1, c_btn2 = st.columns(2)
+        with c_btn1:
+            if st.button("⬇️ Copiar das Notas", use_container_width=True):
+                if "notepad_notes" in st.session_state and st.session_state.notepad_notes:
+                    st.session_state.copy_from_notes = True
+                    rerun_panel()
+                else:
+                    st.toast("Nada para copiar!", icon="⚠️")
+
+        with c_btn2:
+            if st.button("➕ Salvar no Histórico", type="primary", use_container_width=True):
+                if new_archive_input:
+                    try:
+                        # Confirmado ao gravar na fila local; o envio ao MongoDB é feito em segundo plano
+                        entry = get_save_queue().enqueue(build_entry(
+                            new_archive_input,
+                            user=st.session_state.get("notepad_user", ""),
+                            title=st.session_state.get("notepad_title", ""),
+                        ))
+                        if "history_entries" in st.session_state:
+                            st.session_state.history_entries.insert(0, entry)
+                        if read_only:
+                            st.toast("Salvo localmente: será enviado ao banco quando a conexão voltar.", icon="💾")
+                        else:
+                            st.toast("Salvo com sucesso!", icon="✅")
+                        st.session_state.new_archive_input = ""
+                        st.session_state.copy_from_notes = False
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"Erro: {e}")
+                else:
+                    st.warning("Escreva algo para salvar.")
+
+
+@st.fragment
+def history_panel(db, collection):
+    """Histórico, busca e relatório completo (paginação e busca reexecutam só este painel)."""
+    notes = st.session_state.get("notepad_notes", "")
+    usuario = st.session_state.get("notepad_user", "")
+
+    st.markdown("### 📜 Histórico")
+    # Recuperar histórico (apenas as entradas mais recentes; páginas anteriores sob demanda)
+    history_content = "Carregando..."
+    save_queue = get_save_queue()
+    pending_entries = save_queue.pending_entries()
+    if db is not None:
+        if "history_entries" not in st.session_state:
+            load_history_page(collection)
+        else:
+            refresh_history(collection)
+        history_entries = with_pending(st.session_state.history_entries, pending_entries)
+        history_content = format_entries(reversed(history_entries)) or "(Histórico vazio)"
+    else:
+        snapshot_entries, snapshot_saved_at = load_snapshot()
+        history_content = format_entries(reversed(with_pending(snapshot_entries, pending_entries))) or "Sem conexão."
+        if snapshot_saved_at:
+            st.caption(f"Cópia local de {snapshot_saved_at.strftime('%d/%m/%Y %H:%M')} ({len(snapshot_entries)} entradas mais recentes).")
+    if pending_entries:
+        last_error = f" Último erro: {save_queue.last_error}" if save_queue.last_error else ""
+        st.caption(f"⏳ {len(pending_entries)} entrada(s) aguardando envio ao banco.{last_error}")
+    quarantined = save_queue.quarantined_count()
+    if quarantined:
+        st.caption(f"⚠️ {quarantined} entrada(s) recusada(s) pelo banco; guardadas na fila local ({QUEUE_FILE}).")
+
+    st.text_area("Histórico", value=history_content, height=350, disabled=True, label_visibility="collapsed")
+
+    if db is not None and st.session_state.get("history_has_more"):
+        if st.button("⏫ Carregar entradas anteriores", use_container_width=True):
+            load_history_page(collection)
+            rerun_panel()
+
+    if db is not None:
+        with st.expander("🔎 Buscar no Histórico", expanded=False):
+            search_query = st.text_input("Buscar por:", key="search_query", placeholder="Ex: orçamento unidade x")
+            s1, s2, s3 = st.columns(3)
+            with s1:
+                search_user = st.text_input("Usuário", key="search_user")
+            with s2:
+                search_title = st.text_input("Título contém", key="search_title")
+            with s3:
+                search_period = st.date_input("Período", value=(), key="search_period", format="DD/MM/YYYY")
+
+            # Nova busca volta para a primeira página
+            search_signature = (search_query, search_user, search_title, tuple(search_period))
+            if st.session_state.get("search_signature") != search_signature:
+                st.session_state.search_signature = search_signature
+                st.session_state.search_page = 0
+
+            if search_query.strip():
+                date_from = search_period[0] if len(search_period) > 0 else None
+                date_to = search_period[1] if len(search_period) > 1 else date_from
+                results, has_next = search_archive(
+                    collection,
+                    search_query,
+                    user=search_user.strip() or None,
+                    title=search_title.strip() or None,
+                    date_from=date_from,
+                    date_to=date_to,
+                    page=st.session_state.search_page,
+                )
+                if not results:
+                    st.info("Nenhuma entrada encontrada.")
+                for result in results:
+                    st.markdown(f"**{format_header(result)}**  \n{result['snippet']}")
+
+                p1, p2, p3 = st.columns([1, 2, 1])
+                with p1:
+                    if st.session_state.search_page > 0 and st.button("◀ Anterior", key="search_prev"):
+                        st.session_state.search_page -= 1
+                        rerun_panel()
+                with p2:
+                    st.caption(f"Página {st.session_state.search_page + 1}")
+                with p3:
+                    if has_next and st.button("Próxima ▶", key="search_next"):
+                        st.session_state.search_page += 1
+                        rerun_panel()
+
+    if history_content != "(Histórico vazio)" or notes:
+        rel_title = "Relatório Completo de Notas"
+        rel_subtitle = f"Usuário: {usuario or 'Não informado'}"
+
+        def build_full_report():
+            report_head = ["ANOTAÇÕES ATUAIS:", notes if notes else "(Vazio)", "", "--- HISTÓRICO ---"]
+            history_version = archive_fingerprint(collection) if collection is not None else "Sem conexão."
+            return cached_pdf(
+                rel_title,
+                rel_subtitle,
+                chain(report_head, iter_history_lines(collection)),
+                key_body=report_head + [history_version],
+                stamped=True,
+            )
+
+        st.download_button("📥 Baixar Relatório Completo (PDF)", build_full_report, file_name=f"Relatorio_Completo_{datetime.now().strftime('%Y-%m-%d')}.pdf", mime="application/pdf", use_container_width=True)
+
+
+@st.fragment
+def ai_summaries_panel(db, collection):
+    """Resumos do repositório e da descrição da reunião (reexecuta só este painel)."""
+    notes = st.session_state.get("notepad_notes", "")
+    usuario = st.session_state.get("notepad_user", "")
+
+    with st.expander("📊 Resumo do Histórico Completo", expanded=True):
+        ai_instructions = st.text_input(
+            "Foco da análise (Opcional):",
+            key="repo_summary_instructions",
+            placeholder="Ex: Decisões de Janeiro, foco no projeto X..."
+        )
+        if st.button("✨ Gerar Resumo do Repositório", use_container_width=True):
+            render_ai_output(summarize_repository(
+                get_digested_history(db),
+                additional_instructions=ai_instructions,
+                stream=True,
+            ))
+            render_prompt_tokens("summarize_repository")
+
+    with st.expander("🧾 Resumo Executivo da Descrição da Reunião", expanded=False):
+        desc_instructions = st.text_input(
+            "Ajustes de foco (Opcional):",
+            key="desc_summary_instructions",
+            placeholder="Ex: Foque em riscos, conflitos e próximos passos..."
+        )
+        if st.button("⚡ Gerar Resumo da Descrição", use_container_width=True):
+            if not notes or not notes.strip():
+                st.warning("Preencha a Descrição da Reunião antes de gerar o resumo executivo.")
+            else:
+                resumo_desc = render_ai_output(summarize_meeting_description(
+                    notes,
+                    get_relevant_history(db, collection, f"{notes} {desc_instructions}"),
+                    additional_instructions=desc_instructions,
+                    stream=True,
+                ))
+                render_prompt_tokens("summarize_meeting_description")
+
+                st.session_state["last_desc_summary"] = resumo_desc
+
+        if "last_desc_summary" in st.session_state:
+            resumo_para_pdf = st.session_state["last_desc_summary"]
+            ts_pdf = datetime.now().strftime("%Y-%m-%d_%H-%M")
+            resumo_title = "Resumo Executivo da Reunião"
+            resumo_subtitle = f"Usuário: {usuario or 'Não informado'}"
+            st.download_button(
+                "📥 Baixar Resumo Executivo (PDF)",
+                lambda: cached_pdf(resumo_title, resumo_subtitle, resumo_para_pdf, stamped=True),
+                file_name=f"Resumo_Descricao_{ts_pdf}.pdf",
+                mime="application/pdf",
+                use_container_width=True,
+            )
+
+    if st.button("🚀 Gerar os dois resumos em paralelo", use_container_width=True):
+        futures = {
+            "📊 Resumo do Repositório": summarize_repository_async(
+                get_digested_history(db),
+                additional_instructions=ai_instructions,
+            ),
+        }
+        if notes and notes.strip():
+            futures["🧾 Resumo da Descrição"] = summarize_meeting_description_async(
+                notes,
+                get_relevant_history(db, collection, f"{notes} {desc_instructions}"),
+                additional_instructions=desc_instructions,
+            )
+        else:
+            st.warning("Descrição da Reunião vazia: apenas o resumo do repositório será gerado.")
+        results = render_ai_futures(futures)
+        if "🧾 Resumo da Descrição" in results:
+            st.session_state["last_desc_summary"] = results["🧾 Resumo da Descrição"]
+
+
+@st.fragment
+def chat_panel(db, collection):
+    """Chat com o Aurélius (cada mensagem reexecuta só este painel)."""
+    with st.container(border=True):
+        st.markdown("**💬 Aurélius – Assistente Virtual da Rede Lius**")
+
+        if "chat_messages" not in st.session_state:
+            st.session_state.chat_messages = []
+        if "chat_state" not in st.session_state:
+            st.session_state.chat_state = ChatState()
+
+        for msg in st.session_state.chat_messages:
+            if msg.get("role") == "user":
+                with st.chat_message("user"):
+                    st.markdown(msg.get("content", ""))
+            else:
+                with st.chat_message("assistant"):
+                    st.markdown(msg.get("content", ""))
+
+        user_question = st.text_input(
+            "Sua mensagem para o Aurélius:",
+            placeholder="Ex: O que foi decidido sobre o orçamento na última reunião?",
+            label_visibility="collapsed",
+            key="repo_chat_question",
+        )
+
+        if st.button("Enviar mensagem", use_container_width=True):
+            if user_question:
+                st.session_state.chat_messages.append(
+                    {"role": "user", "content": user_question}
+                )
+                with st.chat_message("user"):
+                    st.markdown(user_question)
+                chat = st.session_state.chat_state
+                # Perguntas de seguimento sobre o mesmo assunto reaproveitam o contexto anterior
+                content = None
+                if chat.reusable_context(user_question) is None:
+                    content = get_relevant_history(db, collection, chat.retrieval_query(user_question))
+                with st.chat_message("assistant"):
+                    answer = render_ai_output(ask_repository(
+                        content,
+                        user_question,
+                        stream=True,
+                        chat=chat,
+                    ))
+                remember_chat_turn(chat, user_question, answer)
+                st.session_state.chat_messages.append(
+                    {"role": "assistant", "content": answer}
+                )
+                rerun_panel()
+            else:
+                st.warning("Digite uma pergunta.")
+
 
 # Título
 st.title("📝 Aurelius - O Assistente de IA da Rede Lius")
@@ -151,83 +663,114 @@ if mode == "Ata de Reunião":
 
         # Geração da Ata
         if st.button("📄 Gerar Ata de Reunião", type="primary"):
-            if not topic:
+            if not topic.strip():
                 st.error("Por favor, informe pelo menos o assunto da reunião.")
             else:
                 # Formatação do Texto
-                attendees_list = [a.strip() for a in attendees.split('\n') if a.strip()]
-                absent_list = [a.strip() for a in absent.split('\n') if a.strip()]
-                
-                md_output = f"""# Ata de Reunião: {topic}
-
-**Data:** {date.strftime("%d/%m/%Y")}  
-**Horário:** {time.strftime("%H:%M")}  
-**Local:** {location}  
-**Organizador:** {organizer}
-
----
-
-## 👥 Participantes
-**Presentes:**
-{chr(10).join([f'- {p}' for p in attendees_list]) if attendees_list else '- (Nenhum listado)'}
-
-**Ausentes:**
-{chr(10).join([f'- {p}' for p in absent_list]) if absent_list else '- (Nenhum)'}
-
----
-
-## 📅 Pauta / Agenda
-{agenda if agenda else 'Não especificada.'}
-
----
-
-## 📝 Discussão e Decisões
-{discussion if discussion else 'Nenhuma nota registrada.'}
-
----
-
-## ✅ Ações / Próximos Passos
-"""
-                if st.session_state.actions:
-                    for idx, action in enumerate(st.session_state.actions, 1):
-                        md_output += f"{idx}. **{action['Tarefa']}** - Resp: {action['Responsável']} (Até: {action['Prazo']})\n"
+                meeting = normalize_meeting({
+                    "topic": topic,
+                    "date": date,
+                    "time": time,
+                    "location": location,
+                    "organizer": organizer,
+                    "attendees": [a.strip() for a in attendees.split('\n') if a.strip()],
+                    "absent": [a.strip() for a in absent.split('\n') if a.strip()],
+                    "agenda": agenda,
+                    "discussion": discussion,
+                    "actions": st.session_state.actions,
+                })
+                md_output = build_ata_markdown(meeting)
+
+                if not database_ready():
+                    st.warning("Ata gerada, mas as ações não foram registradas: banco de dados indisponível.")
                 else:
-                    md_output += "Nenhuma ação definida.\n"
-                
-                md_output += "\n---\n*Gerado por Aurelius*"
+                    try:
+                        save_ata_actions(get_actions_database(), meeting, md_output)
+                    except Exception as e:
+                        st.warning(f"Ata gerada, mas as ações não foram registradas no banco: {e}")
 
                 st.success("Ata gerada com sucesso!")
                 
                 st.markdown("### Pré-visualização")
                 st.markdown(md_output)
 
-                ata_title = f"Ata de Reunião: {topic}"
-                ata_subtitle = (
-                    f"Data: {date.strftime('%d/%m/%Y')}\n"
-                    f"Horário: {time.strftime('%H:%M')}\n"
-                    f"Local: {location}\n"
-                    f"Organizador: {organizer}"
-                )
-                ata_pdf = build_pdf(ata_title, ata_subtitle, md_output)
-
+                ata_title, ata_subtitle = ata_pdf_header(meeting)
                 st.download_button(
                     label="📥 Baixar Ata (PDF)",
-                    data=ata_pdf,
+                    data=lambda: cached_pdf(ata_title, ata_subtitle, md_output),
                     file_name=f"Ata_{topic.replace(' ', '_')}_{date}.pdf",
                     mime="application/pdf"
                 )
 
+        st.markdown("---")
+
+        # Acompanhamento das ações registradas
+        with st.expander("📌 Ações Pendentes", expanded=False):
+            if not database_ready():
+                st.info("Banco de dados indisponível no momento. Tente novamente em instantes.")
+            else:
+                try:
+                    actions_db = get_actions_database()
+                    f1, f2 = st.columns([3, 1])
+                    with f1:
+                        owner_filter = st.selectbox("Responsável", ["Todos"] + action_owners(actions_db), key="actions_owner")
+                    with f2:
+                        st.write("")
+                        only_overdue = st.checkbox("Apenas atrasadas", key="actions_overdue")
+                    owner = None if owner_filter == "Todos" else owner_filter
+                    found_actions = overdue_actions(actions_db, owner=owner) if only_overdue else pending_actions(actions_db, owner=owner)
+
+                    if found_actions:
+                        st.dataframe(pd.DataFrame(format_actions_table(found_actions)), hide_index=True, use_container_width=True)
+                        labels = {a["_id"]: f"{a['Tarefa']} ({a['Responsável']})" for a in found_actions}
+                        done_id = st.selectbox("Marcar como concluída:", list(labels), format_func=labels.get, key="actions_done")
+                        if st.button("✔️ Concluir Ação"):
+                            set_action_status(actions_db, done_id)
+                            st.rerun()
+                    else:
+                        st.info("Nenhuma ação pendente encontrada.")
+                except Exception as e:
+                    st.error(f"Erro ao consultar as ações: {e}")
+
+        # Geração em lote
+        with st.expander("📦 Gerar Atas em Lote (CSV ou JSON)", expanded=False):
+            st.caption(
+                "Colunas: topic, date, time, location, organizer, attendees, absent, agenda, discussion, actions. "
+                "Listas separadas por ';' e ações no formato 'tarefa | responsável | prazo'."
+            )
+            batch_file = st.file_uploader("Arquivo de reuniões", type=["csv", "json"], key="ata_batch_file")
+            if batch_file is not None and st.button("📦 Gerar Atas em Lote"):
+                try:
+                    meetings = load_meetings(batch_file.getvalue(), batch_file.name)
+                    with st.spinner(f"Gerando {len(meetings)} atas..."):
+                        st.session_state.ata_batch_zip = generate_atas_zip(meetings)
+                    st.success(f"{len(meetings)} atas geradas com sucesso!")
+                except ValueError as e:
+                    st.error(f"Erro no arquivo: {e}")
+
+            if st.session_state.get("ata_batch_zip"):
+                st.download_button(
+                    label="📥 Baixar Atas (ZIP)",
+                    data=st.session_state.ata_batch_zip,
+                    file_name=f"Atas_{datetime.now().strftime('%Y-%m-%d_%H-%M')}.zip",
+                    mime="application/zip"
+                )
+
 elif mode == "Bloco de Notas":
     st.markdown("Modo simplificado para anotações rápidas e arquivamento, com integração com o Aurelius.")
     
-    # Conexão com MongoDB
+    # Conexão com MongoDB (sem resposta ao ping, a página segue em modo somente leitura)
     db = None
-    try:
-        db = get_database()
-        collection = db['repositorio']
-        doc_id = "global_notepad_archive"
-    except Exception as e:
-        st.error(f"Erro ao conectar ao banco de dados: {e}")
+    collection = None
+    read_only = not database_ready()
+    if read_only:
+        st.warning("⚠️ Banco de dados indisponível no momento: histórico exibido a partir da última cópia local; novos saves ficam na fila e são enviados quando a conexão voltar.")
+    else:
+        try:
+            collection = get_archive_collection()
+            db = get_database()
+        except Exception as e:
+            st.error(f"Erro ao conectar ao banco de dados: {e}")
 
     col_left, col_right = st.columns([1, 1], gap="large")
     
@@ -247,163 +790,19 @@ elif mode == "Bloco de Notas":
         
         with tab_repo:
             st.caption("Gerencie o histórico centralizado de anotações.")
-
-            if "new_archive_input" not in st.session_state:
-                st.session_state.new_archive_input = ""
-
-            if st.session_state.get("copy_from_notes", False):
-                if "notepad_notes" in st.session_state and st.session_state.notepad_notes:
-                    st.session_state.new_archive_input = st.session_state.notepad_notes
-                st.session_state.copy_from_notes = False
-
-            with st.container(border=True):
-                st.markdown("**Adicionar ao Arquivo**")
-                new_archive_input = st.text_area(
-                    "Nova nota:",
-                    height=100,
-                    key="new_archive_input",
-                    placeholder="Digite ou copie aqui...",
-                    label_visibility="collapsed"
-                )
-
-                c_btn1, c_btn2 = st.columns(2)
-                with c_btn1:
-                    if st.button("⬇️ Copiar das Notas", use_container_width=True):
-                        if "notepad_notes" in st.session_state and st.session_state.notepad_notes:
-                            st.session_state.copy_from_notes = True
-                            st.rerun()
-                        else:
-                            st.toast("Nada para copiar!", icon="⚠️")
-
-                with c_btn2:
-                    if st.button("➕ Salvar no Histórico", type="primary", use_container_width=True):
-                        if new_archive_input:
-                            if db is not None:
-                                try:
-                                    current_doc = collection.find_one({"_id": doc_id})
-                                    current_text = current_doc["content"] if current_doc and "content" in current_doc else ""
-
-                                    timestamp = datetime.now().strftime("%d/%m/%Y %H:%M")
-                                    user_str = f" | 👤 {usuario}" if usuario else ""
-                                    titulo_str = ""
-                                    if "notepad_title" in st.session_state and st.session_state.notepad_title:
-                                        titulo_str = f" | Título: {st.session_state.notepad_title}"
-                                    new_entry = f"\n\n=== 📅 {timestamp}{user_str}{titulo_str} ===\n{new_archive_input}"
-
-                                    updated_text = (current_text + new_entry) if current_text else f"=== 📅 {timestamp}{user_str}{titulo_str} ===\n{new_archive_input}"
-
-                                    collection.update_one(
-                                        {"_id": doc_id},
-                                        {"$set": {"content": updated_text, "updated_at": datetime.now()}},
-                                        upsert=True
-                                    )
-                                    st.toast("Salvo com sucesso!", icon="✅")
-                                    st.session_state.new_archive_input = ""
-                                    st.session_state.copy_from_notes = False
-                                    st.rerun()
-                                except Exception as e:
-                                    st.error(f"Erro: {e}")
-                            else:
-                                st.error("Sem conexão.")
-                        else:
-                            st.warning("Escreva algo para salvar.")
-
-            st.markdown("### 📜 Histórico")
-            # Recuperar histórico
-            history_content = "Carregando..."
-            if db is not None:
-                saved_doc = collection.find_one({"_id": doc_id})
-                history_content = saved_doc["content"] if saved_doc and "content" in saved_doc else "(Histórico vazio)"
-            else:
-                history_content = "Sem conexão."
-                
-            st.text_area("Histórico", value=history_content, height=350, disabled=True, label_visibility="collapsed")
-            
-            if history_content != "(Histórico vazio)" or notes:
-                rel_title = "Relatório Completo de Notas"
-                rel_subtitle = f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}\nUsuário: {usuario or 'Não informado'}"
-                full_content = f"ANOTAÇÕES ATUAIS:\n{notes if notes else '(Vazio)'}\n\n--- HISTÓRICO ---\n{history_content}"
-                rel_pdf = build_pdf(rel_title, rel_subtitle, full_content)
-                st.download_button("📥 Baixar Relatório Completo (PDF)", rel_pdf, file_name=f"Relatorio_Completo_{datetime.now().strftime('%Y-%m-%d')}.pdf", mime="application/pdf", use_container_width=True)
+            archive_input_panel(read_only)
+            history_panel(db, collection)
 
         with tab_ai:
             st.caption("Analise o histórico com inteligência artificial.")
-
-            with st.expander("📊 Resumo do Histórico Completo", expanded=True):
-                ai_instructions = st.text_input(
-                    "Foco da análise (Opcional):",
-                    key="repo_summary_instructions",
-                    placeholder="Ex: Decisões de Janeiro, foco no projeto X..."
-                )
-                if st.button("✨ Gerar Resumo do Repositório", use_container_width=True):
-                    resumo = summarize_repository(history_content, additional_instructions=ai_instructions)
-                    st.markdown(resumo)
-
-            with st.expander("🧾 Resumo Executivo da Descrição da Reunião", expanded=False):
-                desc_instructions = st.text_input(
-                    "Ajustes de foco (Opcional):",
-                    key="desc_summary_instructions",
-                    placeholder="Ex: Foque em riscos, conflitos e próximos passos..."
-                )
-                if st.button("⚡ Gerar Resumo da Descrição", use_container_width=True):
-                    if not notes or not notes.strip():
-                        st.warning("Preencha a Descrição da Reunião antes de gerar o resumo executivo.")
-                    else:
-                        resumo_desc = summarize_meeting_description(
-                            notes,
-                            history_content,
-                            additional_instructions=desc_instructions,
-                        )
-                        st.markdown(resumo_desc)
-
-                        st.session_state["last_desc_summary"] = resumo_desc
-
-                if "last_desc_summary" in st.session_state:
-                    resumo_para_pdf = st.session_state["last_desc_summary"]
-                    ts_pdf = datetime.now().strftime("%Y-%m-%d_%H-%M")
-                    resumo_title = "Resumo Executivo da Reunião"
-                    resumo_subtitle = f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}\nUsuário: {usuario or 'Não informado'}"
-                    resumo_pdf = build_pdf(resumo_title, resumo_subtitle, resumo_para_pdf)
-                    st.download_button(
-                        "📥 Baixar Resumo Executivo (PDF)",
-                        resumo_pdf,
-                        file_name=f"Resumo_Descricao_{ts_pdf}.pdf",
-                        mime="application/pdf",
-                        use_container_width=True,
-                    )
-
+            ai_summaries_panel(db, collection)
             st.markdown("---")
+            chat_panel(db, collection)
 
-            with st.container(border=True):
-                st.markdown("**💬 Aurélius – Assistente Virtual da Rede Lius**")
-
-                if "chat_messages" not in st.session_state:
-                    st.session_state.chat_messages = []
-
-                for msg in st.session_state.chat_messages:
-                    if msg.get("role") == "user":
-                        with st.chat_message("user"):
-                            st.markdown(msg.get("content", ""))
-                    else:
-                        with st.chat_message("assistant"):
-                            st.markdown(msg.get("content", ""))
-
-                user_question = st.text_input(
-                    "Sua mensagem para o Aurélius:",
-                    placeholder="Ex: O que foi decidido sobre o orçamento na última reunião?",
-                    label_visibility="collapsed",
-                    key="repo_chat_question",
-                )
-
-                if st.button("Enviar mensagem", use_container_width=True):
-                    if user_question:
-                        st.session_state.chat_messages.append(
-                            {"role": "user", "content": user_question}
-                        )
-                        answer = ask_repository(history_content, user_question)
-                        st.session_state.chat_messages.append(
-                            {"role": "assistant", "content": answer}
-                        )
-                        st.rerun()
-                    else:
-                        st.warning("Digite uma pergunta.")
+# Painel de desempenho (admin): no fim do script, para incluir as operações desta execução (os painéis em
+# fragmento não o redesenham: ele é atualizado na próxima execução completa da página)
+if metrics_panel_enabled():
+    with st.sidebar:
+        st.markdown("---")
+        with st.expander("⏱️ Desempenho (admin)", expanded=False):
+            render_metrics_panel()
@@ -0,0 +1,175 @@
+import hashlib
+from datetime import datetime
+
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+
+from metrics import instrumented
+
+# Atas geradas e suas ações (uma ação por documento)
+ATAS_COLLECTION = "atas"
+ACTIONS_COLLECTION = "acoes"
+
+STATUS_PENDING = "pendente"
+STATUS_DONE = "concluída"
+
+DEADLINE_FORMAT = "%d/%m/%Y"
+ACTION_PROJECTION = {"Tarefa": 1, "Responsável": 1, "Prazo": 1, "status": 1, "ata_id": 1, "topic": 1}
+
+
+def ensure_action_indexes(db):
+    """Índices das consultas de pendências: por responsável e por prazo (atrasadas)."""
+    actions = db[ACTIONS_COLLECTION]
+    actions.create_index([("Responsável", ASCENDING), ("Prazo", ASCENDING), ("status", ASCENDING)])
+    actions.create_index([("status", ASCENDING), ("Prazo", ASCENDING)])
+    actions.create_index([("ata_id", ASCENDING)])
+
+
+def _parse_deadline(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(str(value).strip(), DEADLINE_FORMAT)
+    except ValueError:
+        return None
+
+
+def _normalize_key(text):
+    return " ".join(str(text or "").split()).casefold()
+
+
+def ata_id_for(meeting):
+    """
+    Identificador estável da ata: gerar a mesma ata de novo não duplica as ações.
+
+    Usa assunto, data, horário (em minutos) e organizador, para que duas reuniões
+    com o mesmo assunto no mesmo dia não compartilhem a ata.
+    """
+    time = meeting["time"].strftime("%H:%M") if meeting.get("time") else ""
+    key = "\n".join([
+        _normalize_key(meeting["topic"]), str(meeting["date"]), time, _normalize_key(meeting.get("organizer")),
+    ])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+
+
+def action_id_for(ata_id, action):
+    """Identificador da ação pelo conteúdo (tarefa + responsável), independente da posição na ata."""
+    key = f"{_normalize_key(action['Tarefa'])}\n{_normalize_key(action['Responsável'])}"
+    return f"{ata_id}:{hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]}"
+
+
+@instrumented("mongo.save_ata_actions")
+def save_ata_actions(db, meeting, md_output):
+    """
+    Registra a ata e suas ações como documentos consultáveis.
+
+    As ações são gravadas com upsert por (ata, tarefa + responsável): o status de
+    ações já existentes (ex.: concluídas) é preservado ao gerar a ata novamente,
+    mesmo que outras ações tenham sido incluídas ou removidas.
+
+    Args:
+        db: Base de dados do MongoDB.
+        meeting (dict): Reunião normalizada (ver ata.normalize_meeting).
+        md_output (str): Texto Markdown da ata.
+
+    Returns:
+        str: Identificador da ata.
+    """
+    ata_id = ata_id_for(meeting)
+    now = datetime.now()
+
+    # Ações repetidas na mesma ata viram uma só
+    unique_actions = {}
+    for action in meeting["actions"]:
+        unique_actions.setdefault(action_id_for(ata_id, action), action)
+    action_ids = list(unique_actions)
+
+    previous = db[ATAS_COLLECTION].find_one_and_update(
+        {"_id": ata_id},
+        {
+            "$set": {
+                "topic": meeting["topic"],
+                "date": datetime.combine(meeting["date"], meeting.get("time") or datetime.min.time()),
+                "organizer": meeting.get("organizer", ""),
+                "markdown": md_output,
+                "action_count": len(meeting["actions"]),
+                "action_ids": action_ids,
+                "updated_at": now,
+            },
+            "$setOnInsert": {"created_at": now},
+        },
+        projection={"action_ids": 1},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE,
+    )
+    operations = [
+        UpdateOne(
+            {"_id": action_id},
+            {
+                "$set": {
+                    "ata_id": ata_id,
+                    "topic": meeting["topic"],
+                    "Tarefa": action["Tarefa"],
+                    "Responsável": action["Responsável"].strip(),
+                    "Prazo": _parse_deadline(action["Prazo"]),
+                    "updated_at": now,
+                },
+                "$setOnInsert": {"status": STATUS_PENDING, "created_at": now},
+            },
+            upsert=True,
+        )
+        for action_id, action in unique_actions.items()
+    ]
+    actions = db[ACTIONS_COLLECTION]
+    if operations:
+        actions.bulk_write(operations, ordered=False)
+    # Ações removidas da ata deixam de existir (só as que esta mesma ata registrou da última vez)
+    removed = set((previous or {}).get("action_ids", [])) - set(action_ids)
+    if removed:
+        actions.delete_many({"ata_id": ata_id, "_id": {"$in": sorted(removed)}})
+    return ata_id
+
+
+@instrumented("mongo.pending_actions")
+def pending_actions(db, owner=None, limit=200):
+    """Ações pendentes (opcionalmente de um responsável), das de prazo mais próximo para as mais distantes."""
+    query = {"status": STATUS_PENDING}
+    if owner:
+        query["Responsável"] = owner
+    return list(db[ACTIONS_COLLECTION].find(query, ACTION_PROJECTION, sort=[("Prazo", ASCENDING)], limit=limit))
+
+
+@instrumented("mongo.overdue_actions")
+def overdue_actions(db, owner=None, today=None, limit=200):
+    """Ações pendentes com prazo vencido."""
+    today = today or datetime.now()
+    query = {"status": STATUS_PENDING, "Prazo": {"$lt": datetime(today.year, today.month, today.day)}}
+    if owner:
+        query["Responsável"] = owner
+    return list(db[ACTIONS_COLLECTION].find(query, ACTION_PROJECTION, sort=[("Prazo", ASCENDING)], limit=limit))
+
+
+def action_owners(db):
+    """Responsáveis com ações pendentes (lido do índice por responsável)."""
+    return sorted(o for o in db[ACTIONS_COLLECTION].distinct("Responsável", {"status": STATUS_PENDING}) if o)
+
+
+def set_action_status(db, action_id, status=STATUS_DONE):
+    """Altera o status de uma ação (ex.: marcar como concluída)."""
+    db[ACTIONS_COLLECTION].update_one(
+        {"_id": action_id},
+        {"$set": {"status": status, "updated_at": datetime.now()}},
+    )
+
+
+def format_actions_table(actions):
+    """Linhas prontas para exibição em tabela."""
+    return [
+        {
+            "Tarefa": action["Tarefa"],
+            "Responsável": action["Responsável"],
+            "Prazo": action["Prazo"].strftime(DEADLINE_FORMAT) if action.get("Prazo") else "",
+            "Status": action["status"],
+            "Ata": action.get("topic", ""),
+        }
+        for action in actions
+    ]
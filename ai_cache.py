@@ -0,0 +1,120 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+# Tamanho padrão do tier em memória e validade do tier no MongoDB
+DEFAULT_MEMORY_SIZE = 256
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+CACHE_COLLECTION = "cache_respostas_ia"
+
+
+def make_cache_key(model, messages, temperature, max_tokens):
+    """Gera a chave do cache a partir de tudo o que influencia a resposta da IA."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Cache LRU em memória, seguro para uso entre threads do Streamlit."""
+
+    def __init__(self, maxsize=DEFAULT_MEMORY_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class MongoCacheTier:
+    """Tier persistente no MongoDB, com expiração automática via índice TTL."""
+
+    def __init__(self, collection, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.collection = collection
+        self.collection.create_index("created_at", expireAfterSeconds=ttl_seconds)
+
+    def get(self, key):
+        doc = self.collection.find_one({"_id": key}, {"value": 1})
+        return doc["value"] if doc else None
+
+    def set(self, key, value):
+        self.collection.replace_one(
+            {"_id": key},
+            {"value": value, "created_at": datetime.utcnow()},
+            upsert=True,
+        )
+
+
+class ResponseCache:
+    """
+    Cache de respostas da IA em dois níveis: LRU em memória e (opcionalmente) MongoDB.
+
+    Falhas no tier do MongoDB nunca impedem a chamada à IA; apenas contam como miss.
+    """
+
+    def __init__(self, memory_size=DEFAULT_MEMORY_SIZE, persistent=None):
+        self.memory = LRUCache(memory_size)
+        self.persistent = persistent
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "errors": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+
+        if self.persistent is not None:
+            try:
+                value = self.persistent.get(key)
+            except Exception:
+                self._count("errors")
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+                self._count("persistent_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.persistent is not None:
+            try:
+                self.persistent.set(key, value)
+            except Exception:
+                self._count("errors")
+
+    def get_stats(self):
+        """Contadores de hits/misses e tamanho atual do tier em memória."""
+        with self._lock:
+            stats = dict(self.stats)
+        stats["hits"] = stats["memory_hits"] + stats["persistent_hits"]
+        stats["memory_entries"] = len(self.memory)
+        return stats
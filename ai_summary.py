@@ -1,10 +1,29 @@
 import streamlit as st
 import requests
 import json
-import pandas as pd
+import time
+import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import os
-import msoffcrypto
-import io
+from retrieval import select_context
+from chat_memory import compress_memory, format_turns
+from metrics import timed, instrumented
+from token_budget import (
+    Section, fit_sections, count_tokens, truncate_tokens, input_budget, fit_output, CHARS_PER_TOKEN_CEILING,
+)
+from ai_cache import ResponseCache, MongoCacheTier, make_cache_key, CACHE_COLLECTION
+from colleague_directory import ColleagueDirectory
+from cargos_loader import load_cargos_snapshot, CargosDecryptionError
+from hierarchical_summary import (
+    ChunkSummaryStore, build_map_reduce_context, SUMMARY_COLLECTION,
+    MAP_SYSTEM_PROMPT, MAP_PROMPT,
+)
 
 def get_openai_api_key():
     """Recupera a chave da API da OpenAI dos secrets do Streamlit."""
@@ -18,56 +37,401 @@ def get_openai_api_key():
         st.error('Chaves de API não encontradas nas configurações do Streamlit')
         return None
 
-@st.cache_data(show_spinner=False)
-def load_cargos_info():
-    """Carrega informações de cargos do arquivo Excel para contexto, suportando arquivos protegidos por senha."""
+OPENAI_BASE_URL = 'https://api.openai.com/v1'
+
+# Respostas que valem nova tentativa (limite de taxa e falhas temporárias do servidor)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Requisições simultâneas à OpenAI por processo (inclui o map-reduce e as análises em paralelo)
+MAX_CONCURRENT_REQUESTS = 8
+# Análises independentes (resumos, perguntas) executadas ao mesmo tempo no pool compartilhado
+AI_POOL_WORKERS = 4
+
+# Orçamento de tokens das seções variáveis de cada prompt (o texto fixo do template é contado à parte).
+# Seções de prioridade maior são cortadas primeiro quando a soma passa de "total"; "total" também
+# é reduzido para que prompt + "output" (max_tokens da resposta) caibam na janela do modelo.
+PROMPT_BUDGETS = {
+    "summarize_repository": {"total": 7500, "output": 2500, "instructions": 300, "history": 6000, "cargos": 1500},
+    "summarize_meeting_description": {
+        "total": 6000, "output": 2000, "instructions": 300, "description": 3000, "history": 2000, "cargos": 1000,
+    },
+    "ask_repository": {
+        "total": 6000, "output": 500, "question": 300, "conversation": 1200, "history": 3500, "memory": 400, "cargos": 800,
+    },
+}
+
+# Intervalo inicial e máximo (segundos) entre tentativas de conectar o tier do MongoDB dos caches
+MONGO_RETRY_DELAY = 5
+MONGO_MAX_RETRY_DELAY = 300
+
+CONTEXT_OVERFLOW_ERROR = "Erro: o prompt não cabe na janela de contexto do modelo."
+
+# Início de uma unidade do histórico: cabeçalho de entrada ou resumo de período (map-reduce)
+HISTORY_UNIT_START = r"=== |#### Período: "
+
+class OpenAIHttpClient:
+    """
+    Cliente HTTP compartilhado para a API da OpenAI.
+
+    Mantém um pool de conexões keep-alive (requests.Session), aplica timeouts de
+    conexão/leitura e repete requisições com backoff exponencial em 429/5xx,
+    respeitando o cabeçalho Retry-After quando enviado. No máximo max_concurrency
+    requisições ficam em andamento ao mesmo tempo; as demais aguardam a vez.
+    """
+
+    def __init__(self, api_key, base_url=OPENAI_BASE_URL, connect_timeout=5.0, read_timeout=90.0,
+                 max_retries=3, backoff_factor=0.5, max_backoff=20.0, pool_size=10,
+                 max_concurrency=MAX_CONCURRENT_REQUESTS):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Authorization': f'Bearer {api_key.strip()}',
+            'Content-Type': 'application/json'
+        })
+
+    def _retry_delay(self, attempt, response=None):
+        """Tempo de espera antes da próxima tentativa (Retry-After ou backoff exponencial com jitter)."""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                try:
+                    delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                    return min(max(delay, 0.0), self.max_backoff)
+                except (TypeError, ValueError):
+                    pass
+        delay = self.backoff_factor * (2 ** attempt)
+        return min(delay + random.uniform(0, delay / 2), self.max_backoff)
+
+    def post(self, path, payload, stream=False):
+        """
+        Envia um POST para a API, com novas tentativas em erros temporários.
+
+        Returns:
+            requests.Response: A última resposta obtida (o chamador verifica o status).
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        attempt = 0
+        while True:
+            try:
+                # A espera do backoff acontece fora do limite, liberando a vez para outras requisições
+                with self._slots:
+                    response = self.session.post(url, json=payload, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._retry_delay(attempt))
+                attempt += 1
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                return response
+            delay = self._retry_delay(attempt, response)
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def chat_completion(self, body_message, stream=False):
+        """Chama /chat/completions e retorna a resposta já validada (raise_for_status)."""
+        response = self.post('chat/completions', body_message, stream=stream)
+        response.raise_for_status()
+        return response
+
+@st.cache_resource(show_spinner=False)
+def get_http_client(api_key):
+    """Cliente HTTP único por processo (e por chave), reaproveitando conexões entre reruns."""
+    base_url = OPENAI_BASE_URL
     try:
-        file_path = os.path.join(os.getcwd(), 'CARGOS.xlsx')
-        if not os.path.exists(file_path):
-            return "Informações de cargos não disponíveis (Arquivo CARGOS.xlsx não encontrado)."
-        
-        # Tenta recuperar a senha dos secrets
-        excel_password = None
-        try:
-            excel_password = st.secrets["excel"]["password"]
+        base_url = st.secrets["openai"].get("base_url", OPENAI_BASE_URL)
+    except Exception:
+        pass # Sem configuração específica, usa a API pública
+    return OpenAIHttpClient(api_key, base_url=base_url)
+
+class MongoTierConnector:
+    """
+    Conecta sob demanda o tier do MongoDB de um objeto compartilhado (cache, resumos parciais).
 
+    Sem MongoDB, o objeto segue funcionando só em memória e a conexão é tentada de novo
+    nos usos seguintes, com intervalo crescente entre as tentativas (backoff exponencial).
+    """
+
+    def __init__(self, build, attribute, retry_delay=MONGO_RETRY_DELAY, max_retry_delay=MONGO_MAX_RETRY_DELAY):
+        self._build = build
+        self._attribute = attribute
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._delay = retry_delay
+        self._next_attempt = 0.0
+        self._lock = threading.Lock()
+
+    def attach(self, target):
+        """Preenche target.<attribute> com o tier do MongoDB, se ainda vazio e já for hora de tentar."""
+        if getattr(target, self._attribute) is not None or time.monotonic() < self._next_attempt:
+            return target
+        # Outra sessão já está tentando: esta segue só com a memória
+        if not self._lock.acquire(blocking=False):
+            return target
+        try:
+            if getattr(target, self._attribute) is None:
+                from mongodb_config import get_database, database_ready
+                if not database_ready():
+                    raise ConnectionError("MongoDB indisponível")
+                setattr(target, self._attribute, self._build(get_database()))
+                self._delay = self.retry_delay
         except Exception:
-            pass # Nenhuma senha configurada, segue fluxo normal
-            
-        if excel_password:
-            try:
-                # Fluxo para arquivo protegido
-                decrypted_workbook = io.BytesIO()
-                with open(file_path, "rb") as file:
-                    office_file = msoffcrypto.OfficeFile(file)
-                    office_file.load_key(password=excel_password)
-                    office_file.decrypt(decrypted_workbook)
-                
-                df = pd.read_excel(decrypted_workbook)
-            except Exception as crypto_error:
-                # Se falhar a descriptografia, tenta abrir normal (pode ser que a senha não fosse necessária ou estava errada)
-                # ou retorna o erro específico.
-                return f"Erro ao abrir arquivo protegido (verifique a senha no secrets): {str(crypto_error)}"
-        else:
-            # Fluxo padrão sem senha
-            df = pd.read_excel(file_path)
-        
-        # Cria uma string formatada com as informações relevantes
-        cargos_context = "Lista de Colaboradores e Cargos da Rede Lius:\n"
-        for _, row in df.iterrows():
-            nome = str(row.get('NOME', '')).strip()
-            cargo = str(row.get('CARGO', '')).strip()
-            area = str(row.get('ÁREA', '')).strip()
-            unidade = str(row.get('UNIDADE', '')).strip()
-            
-            if nome:
-                cargos_context += f"- {nome}: {cargo} ({area} - {unidade})\n"
-                
-        return cargos_context
+            self._next_attempt = time.monotonic() + self._delay
+            self._delay = min(self._delay * 2, self.max_retry_delay)
+        finally:
+            self._lock.release()
+        return target
+
+@st.cache_resource(show_spinner=False)
+def _response_cache_resource():
+    return ResponseCache(), MongoTierConnector(lambda db: MongoCacheTier(db[CACHE_COLLECTION]), "persistent")
+
+def get_response_cache():
+    """Cache de respostas compartilhado pelo processo (memória + MongoDB, assim que disponível)."""
+    cache, connector = _response_cache_resource()
+    return connector.attach(cache)
+
+@st.cache_resource(show_spinner=False)
+def get_ai_executor():
+    """Pool de threads compartilhado pelas análises disparadas em paralelo (ver *_async)."""
+    return ThreadPoolExecutor(max_workers=AI_POOL_WORKERS, thread_name_prefix="aurelius-ia")
+
+def _spinner(text):
+    """st.spinner na thread do script; nas threads do pool não há onde exibi-lo."""
+    return st.spinner(text) if get_script_run_ctx(suppress_warning=True) is not None else nullcontext()
+
+def _submit(function, *args, **kwargs):
+    """
+    Executa function(*args, **kwargs) no pool compartilhado e devolve um Future com o texto.
+
+    A chave da API é validada antes, na thread do script, para que o erro apareça na tela.
+    """
+    if not get_openai_api_key():
+        future = Future()
+        future.set_result("Erro: Chave da API não configurada.")
+        return future
+    return get_ai_executor().submit(function, *args, **kwargs)
+
+def get_prompt_reports():
+    """Tokens por seção (e do prompt completo) do último prompt de cada operação nesta sessão."""
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return {}
+    return {operation: dict(report) for operation, report in st.session_state.get("prompt_reports", {}).items()}
+
+def _history_section(text, max_tokens, priority):
+    """Histórico cortado em fronteiras de entrada, preservando as mais recentes."""
+    return Section("history", text, max_tokens, priority=priority, separator="\n\n", unit_start=HISTORY_UNIT_START, keep="end")
+
+def _cargos_section(text, max_tokens, priority):
+    """Cargos cortados linha a linha (colaborador a colaborador)."""
+    return Section("cargos", text, max_tokens, priority=priority, separator="\n", unit_start="- ")
+
+def _sections_budget(budget, model):
+    """Limite conjunto das seções: o da operação ou o que ainda cabe na janela do modelo."""
+    return min(budget["total"], input_budget(model, budget["output"]))
+
+def _record_prompt(operation, body_message, counts):
+    """
+    Conta os tokens finais do prompt e ajusta max_tokens para que prompt + resposta caibam na janela.
+
+    O relatório (seções + mensagem de sistema + total) fica na sessão do usuário; chamadas
+    fora de uma sessão (pool de análises em paralelo) não o registram.
+
+    Returns:
+        dict: Tokens por seção, "prompt" e "max_output" (0 se nem o prompt cabe na janela).
+    """
+    messages = body_message["messages"]
+    report = dict(counts)
+    report["system"] = count_tokens(messages[0]["content"])
+    report["prompt"] = sum(count_tokens(message["content"]) for message in messages)
+    body_message["max_tokens"] = fit_output(body_message["model"], report["prompt"], body_message["max_tokens"])
+    if get_script_run_ctx(suppress_warning=True) is not None:
+        st.session_state.setdefault("prompt_reports", {})[operation] = report
+    return dict(report, max_output=body_message["max_tokens"])
+
+def get_cache_stats():
+    """Contadores de hits/misses do cache de respostas da IA."""
+    return get_response_cache().get_stats()
+
+def _record_usage(measurement, body_message, usage, answer):
+    """Tamanho da requisição e da resposta (tokens informados pela API ou contados localmente)."""
+    usage = usage or {}
+    measurement.payload(
+        chars_in=sum(len(message['content']) for message in body_message['messages']),
+        tokens_in=usage.get('prompt_tokens') or sum(count_tokens(m['content']) for m in body_message['messages']),
+        tokens_out=usage.get('completion_tokens') or count_tokens(answer),
+    )
+
+def _request_completion(client, body_message, cache=None):
+    """Envia a requisição à OpenAI, reaproveitando respostas idênticas já obtidas."""
+    cache = cache or get_response_cache()
+    cache_key = make_cache_key(
+        body_message['model'],
+        body_message['messages'],
+        body_message['temperature'],
+        body_message['max_tokens'],
+    )
+    with timed("openai.chat") as measurement:
+        cached = cache.get(cache_key)
+        measurement.cache(cached is not None)
+        if cached is not None:
+            return cached
+
+        response_api = client.chat_completion(body_message)
+        data = response_api.json()
+        resposta = data['choices'][0]['message']['content']
+        _record_usage(measurement, body_message, data.get('usage'), resposta)
+    cache.set(cache_key, resposta)
+    return resposta
+
+@st.cache_resource(show_spinner=False)
+def _chunk_summary_store_resource():
+    return ChunkSummaryStore(), MongoTierConnector(lambda db: db[SUMMARY_COLLECTION], "collection")
+
+def get_chunk_summary_store():
+    """Armazenamento dos resumos parciais do map-reduce (memória + MongoDB, assim que disponível)."""
+    store, connector = _chunk_summary_store_resource()
+    return connector.attach(store)
+
+def _chunk_summarizer(client, model):
+    """Função de map: resume um trecho do histórico (executada em threads de trabalho)."""
+    cache = get_response_cache()
+
+    def summarize(period, text):
+        body_message = {
+            'model': model,
+            'messages': [
+                {"role": "system", "content": MAP_SYSTEM_PROMPT},
+                {"role": "user", "content": MAP_PROMPT.format(period=period, text=text)},
+            ],
+            'temperature': 0.2,
+            'max_tokens': 700
+        }
+        return _request_completion(client, body_message, cache=cache)
+
+    return summarize
+
+def _memory_summarizer(client, model):
+    """Função que atualiza a memória resumida do chat (executada no pool compartilhado)."""
+    cache = get_response_cache()
+
+    def summarize(system, prompt):
+        body_message = {
+            'model': model,
+            'messages': [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            'temperature': 0.2,
+            'max_tokens': 400
+        }
+        return _request_completion(client, body_message, cache=cache)
+
+    return summarize
+
+def get_digest_summarizer(model="gpt-4o-mini"):
+    """Função de resumo usada pelos digests pré-calculados (None se a chave da API não estiver configurada)."""
+    try:
+        api_key = st.secrets["openai"]["api_key"]
+    except Exception:
+        return None
+    return _chunk_summarizer(get_http_client(api_key), model)
+
+def _stream_completion(client, body_message, error_prefix="Erro ao comunicar com a IA"):
+    """
+    Gera os tokens da resposta à medida que chegam (SSE com stream=True).
+
+    A resposta completa é armazenada no cache ao final, e um hit no cache é
+    devolvido de uma só vez.
+    """
+    cache = get_response_cache()
+    cache_key = make_cache_key(
+        body_message['model'],
+        body_message['messages'],
+        body_message['temperature'],
+        body_message['max_tokens'],
+    )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        with timed("openai.chat_stream") as measurement:
+            measurement.cache(True)
+        yield cached
+        return
+
+    parts = []
+    usage = None
+    try:
+        with timed("openai.chat_stream") as measurement:
+            measurement.cache(False)
+            payload = {**body_message, 'stream': True, 'stream_options': {'include_usage': True}}
+            with client.chat_completion(payload, stream=True) as response_api:
+                for line in response_api.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith('data:'):
+                        continue
+                    data = line[len('data:'):].strip()
+                    if data == '[DONE]':
+                        break
+                    chunk = json.loads(data)
+                    usage = chunk.get('usage') or usage
+                    choices = chunk.get('choices') or [{}]
+                    token = (choices[0].get('delta') or {}).get('content')
+                    if token:
+                        parts.append(token)
+                        yield token
+            _record_usage(measurement, body_message, usage, "".join(parts))
+    except Exception as e:
+        yield f"\n\n{error_prefix}: {str(e)}"
+        return
+
+    cache.set(cache_key, "".join(parts))
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _build_colleague_directory(source_hash, _colleagues):
+    """Índice de nomes, reconstruído apenas quando o conteúdo da planilha muda."""
+    return ColleagueDirectory(_colleagues)
+
+@instrumented("cargos.load")
+def load_colleague_directory():
+    """Carrega a planilha de cargos (suportando arquivos protegidos por senha) e monta o índice de nomes."""
+    file_path = os.path.join(os.getcwd(), 'CARGOS.xlsx')
+
+    # Tenta recuperar a senha dos secrets
+    excel_password = None
+    try:
+        excel_password = st.secrets["excel"]["password"]
+    except Exception:
+        pass # Nenhuma senha configurada, segue fluxo normal
+
+    try:
+        snapshot = load_cargos_snapshot(file_path, password=excel_password)
+    except FileNotFoundError:
+        return ColleagueDirectory([], error="Informações de cargos não disponíveis (Arquivo CARGOS.xlsx não encontrado).")
+    except CargosDecryptionError as crypto_error:
+        return ColleagueDirectory([], error=f"Erro ao abrir arquivo protegido (verifique a senha no secrets): {str(crypto_error)}")
     except Exception as e:
-        return f"Erro ao carregar informações de cargos: {str(e)}"
+        return ColleagueDirectory([], error=f"Erro ao carregar informações de cargos: {str(e)}")
+    return _build_colleague_directory(snapshot.source_hash, snapshot.colleagues)
+
+def get_cargos_context(*texts):
+    """Contexto de cargos restrito aos colaboradores citados nos textos (notas, pergunta, instruções)."""
+    directory = load_colleague_directory()
+    return directory.format_context(directory.find_mentioned("\n".join(t for t in texts if t)))
 
-def summarize_repository(content, additional_instructions=None, model="gpt-4o-mini"):
+
+def summarize_repository(content, additional_instructions=None, model="gpt-4o-mini", stream=False):
     """
     Envia o conteúdo do repositório para a OpenAI e retorna um resumo estruturado.
     
@@ -75,9 +439,10 @@ def summarize_repository(content, additional_instructions=None, model="gpt-4o-mi
         content (str): O conteúdo do repositório (histórico de notas).
         additional_instructions (str, optional): Instruções extras do usuário (ex: foco em data X).
         model (str): O modelo da OpenAI a ser utilizado.
+        stream (bool): Se True, retorna um gerador de tokens (para st.write_stream).
         
     Returns:
-        str: O resumo estruturado gerado pela IA ou mensagem de erro.
+        str | Generator[str]: O resumo estruturado gerado pela IA ou mensagem de erro.
     """
     api_key = get_openai_api_key()
     if not api_key:
@@ -86,14 +451,30 @@ def summarize_repository(content, additional_instructions=None, model="gpt-4o-mi
     if not content or content == "(Histórico vazio)":
         return "O repositório está vazio. Nada para resumir."
 
-    # Carrega contexto de cargos
-    cargos_info = load_cargos_info()
+    client = get_http_client(api_key)
+    budget = PROMPT_BUDGETS["summarize_repository"]
 
-    api_url = 'https://api.openai.com/v1/chat/completions'
-    headers_api = {
-        'Authorization': f'Bearer {api_key.strip()}',
-        'Content-Type': 'application/json'
-    }
+    # Históricos que não cabem no orçamento são resumidos por período (map-reduce); os menores vão direto
+    if count_tokens(content) > budget["history"]:
+        try:
+            with _spinner('Resumindo o histórico por período...'), timed("ai.map_reduce"):
+                history_context = build_map_reduce_context(
+                    content, _chunk_summarizer(client, model), get_chunk_summary_store(), model
+                )
+        except Exception as e:
+            return f"Erro ao comunicar com a IA: {str(e)}"
+    else:
+        history_context = select_context(
+            content, additional_instructions, max_chars=budget["history"] * CHARS_PER_TOKEN_CEILING
+        )
+    sections, counts = fit_sections([
+        Section("instructions", additional_instructions or "", budget["instructions"], priority=0),
+        _history_section(history_context, budget["history"], priority=1),
+        _cargos_section(get_cargos_context(history_context, additional_instructions), budget["cargos"], priority=2),
+    ], _sections_budget(budget, model))
+    additional_instructions = sections["instructions"]
+    history_context = sections["history"]
+    cargos_info = sections["cargos"]
 
     # Prepara o bloco de instruções adicionais, se houver
     instructions_block = ""
@@ -119,7 +500,7 @@ def summarize_repository(content, additional_instructions=None, model="gpt-4o-mi
     3. **Estrutura**: Organize a resposta de forma clara e hierárquica.
     
     ### CONTEÚDO PARA ANÁLISE (Histórico de Notas):
-    {content[:15000]}  # Limitando caracteres
+    {history_context}
     
     ### FORMATO DA RESPOSTA ESPERADA:
     1. **Resumo Executivo**: Visão geral estratégica dos temas discutidos.
@@ -137,20 +518,22 @@ def summarize_repository(content, additional_instructions=None, model="gpt-4o-mi
         'model': model,
         'messages': messages,
         'temperature': 0.3,
-        'max_tokens': 2500
+        'max_tokens': budget["output"]
     }
+    if not _record_prompt("summarize_repository", body_message, counts)["max_output"]:
+        return CONTEXT_OVERFLOW_ERROR
+
+    if stream:
+        return _stream_completion(client, body_message)
 
     try:
-        with st.spinner('A IA está analisando o repositório, cruzando com dados corporativos e gerando o resumo...'):
-            response_api = requests.post(api_url, headers=headers_api, json=body_message)
-            response_api.raise_for_status()
-            resposta = response_api.json()['choices'][0]['message']['content']
-            return resposta
+        with _spinner('A IA está analisando o repositório, cruzando com dados corporativos e gerando o resumo...'):
+            return _request_completion(client, body_message)
     except Exception as e:
         return f"Erro ao comunicar com a IA: {str(e)}"
 
 
-def summarize_meeting_description(description, history, additional_instructions=None, model="gpt-4o-mini"):
+def summarize_meeting_description(description, history, additional_instructions=None, model="gpt-4o-mini", stream=False):
     api_key = get_openai_api_key()
     if not api_key:
         return "Erro: Chave da API não configurada."
@@ -158,13 +541,28 @@ def summarize_meeting_description(description, history, additional_instructions=
     if not description or not description.strip():
         return "A descrição da reunião está vazia. Preencha o campo antes de gerar o resumo."
 
-    cargos_info = load_cargos_info()
-
-    api_url = 'https://api.openai.com/v1/chat/completions'
-    headers_api = {
-        'Authorization': f'Bearer {api_key.strip()}',
-        'Content-Type': 'application/json'
-    }
+    budget = PROMPT_BUDGETS["summarize_meeting_description"]
+    # A descrição atual tem prioridade; histórico e cargos são cortados primeiro
+    history_context = select_context(
+        history, f"{description} {additional_instructions or ''}",
+        max_chars=budget["history"] * CHARS_PER_TOKEN_CEILING,
+    )
+    description = truncate_tokens(description, budget["description"])
+    sections, counts = fit_sections([
+        Section("instructions", additional_instructions or "", budget["instructions"], priority=0),
+        Section("description", description, budget["description"], priority=0),
+        _history_section(history_context, budget["history"], priority=2),
+        _cargos_section(
+            get_cargos_context(description, history_context, additional_instructions),
+            budget["cargos"], priority=1,
+        ),
+    ], _sections_budget(budget, model))
+    additional_instructions = sections["instructions"]
+    description = sections["description"]
+    history_context = sections["history"]
+    cargos_info = sections["cargos"]
+
+    client = get_http_client(api_key)
 
     instructions_block = ""
     if additional_instructions and additional_instructions.strip():
@@ -183,10 +581,10 @@ usando o histórico apenas como complemento quando agregar contexto.
 {instructions_block}
 
 ### CONTEÚDO PRIORITÁRIO – DESCRIÇÃO ATUAL DA REUNIÃO:
-{description[:8000]}
+{description}
 
 ### CONTEÚDO DE APOIO – HISTÓRICO RESUMIDO:
-{(history or '')[:7000]}
+{history_context}
 
 ### DIRETRIZES:
 1. Dê ÊNFASE ao campo de descrição atual. Use o histórico apenas para completar lacunas, confirmar decisões ou identificar recorrências.
@@ -212,19 +610,21 @@ usando o histórico apenas como complemento quando agregar contexto.
         "model": model,
         "messages": messages,
         "temperature": 0.25,
-        "max_tokens": 2000,
+        "max_tokens": budget["output"],
     }
+    if not _record_prompt("summarize_meeting_description", body_message, counts)["max_output"]:
+        return CONTEXT_OVERFLOW_ERROR
+
+    if stream:
+        return _stream_completion(client, body_message)
 
     try:
-        with st.spinner("A IA está gerando o resumo executivo da descrição da reunião..."):
-            response_api = requests.post(api_url, headers=headers_api, json=body_message)
-            response_api.raise_for_status()
-            resposta = response_api.json()["choices"][0]["message"]["content"]
-            return resposta
+        with _spinner("A IA está gerando o resumo executivo da descrição da reunião..."):
+            return _request_completion(client, body_message)
     except Exception as e:
         return f"Erro ao comunicar com a IA: {str(e)}"
 
-def ask_repository(content, question, model="gpt-4o-mini"):
+def ask_repository(content, question, model="gpt-4o-mini", stream=False, chat=None):
     """
     Responde a uma pergunta específica do usuário baseada no repositório.
     
@@ -232,34 +632,65 @@ def ask_repository(content, question, model="gpt-4o-mini"):
         content (str): O conteúdo do repositório (histórico de notas).
         question (str): A pergunta do usuário.
         model (str): O modelo da OpenAI a ser utilizado.
+        stream (bool): Se True, retorna um gerador de tokens (para st.write_stream).
+        chat (ChatState, optional): Estado da conversa (memória resumida, últimas trocas
+            e contexto anterior, reaproveitado quando ainda se aplica).
         
     Returns:
-        str: A resposta da IA.
+        str | Generator[str]: A resposta da IA.
     """
     api_key = get_openai_api_key()
     if not api_key:
         return "Erro: Chave da API não configurada."
 
-    if not content or content == "(Histórico vazio)":
-        return "O repositório está vazio. Não há informações para responder."
-
-    cargos_info = load_cargos_info()
+    budget = PROMPT_BUDGETS["ask_repository"]
+    history_context = None
+    if chat is not None:
+        chat.absorb()
+        history_context = chat.reusable_context(question)
+    if history_context is None:
+        if not content or content == "(Histórico vazio)":
+            return "O repositório está vazio. Não há informações para responder."
+        query = chat.retrieval_query(question) if chat is not None else question
+        history_context = select_context(content, query, max_chars=budget["history"] * CHARS_PER_TOKEN_CEILING)
+
+    sections, counts = fit_sections([
+        Section("question", question, budget["question"], priority=0),
+        Section(
+            "conversation", format_turns(chat.turns) if chat is not None else "", budget["conversation"],
+            priority=1, separator="\n\n", unit_start="Usuário: ", keep="end",
+        ),
+        _history_section(history_context, budget["history"], priority=1),
+        Section("memory", chat.memory if chat is not None else "", budget["memory"], priority=2),
+        _cargos_section(get_cargos_context(history_context, question), budget["cargos"], priority=3),
+    ], _sections_budget(budget, model))
+    question = sections["question"]
+    history_context = sections["history"]
+    cargos_info = sections["cargos"]
+    if chat is not None:
+        chat.use_context(history_context)
+
+    # Memória e últimas trocas, para entender perguntas de seguimento
+    conversation_block = ""
+    if sections["memory"] or sections["conversation"]:
+        conversation_block = f"""
+    ### CONVERSA ATÉ AQUI (use para entender a pergunta, não como fonte de fatos):
+    {sections["memory"]}
+
+    {sections["conversation"]}
+    """
 
-    api_url = 'https://api.openai.com/v1/chat/completions'
-    headers_api = {
-        'Authorization': f'Bearer {api_key.strip()}',
-        'Content-Type': 'application/json'
-    }
+    client = get_http_client(api_key)
 
     prompt = f"""
     Você é Aurélius, o assistente virtual corporativo da Rede Lius.
     
     ### CONTEXTO (Histórico de Notas):
-    {content[:15000]}
+    {history_context}
     
     ### CONTEXTO CORPORATIVO (Cargos):
     {cargos_info}
-    
+    {conversation_block}
     ### PERGUNTA DO USUÁRIO:
     "{question}"
     
@@ -283,14 +714,52 @@ def ask_repository(content, question, model="gpt-4o-mini"):
         'model': model,
         'messages': messages,
         'temperature': 0.1, # Temperatura baixa para ser mais factual
-        'max_tokens': 500
+        'max_tokens': budget["output"]
     }
+    if not _record_prompt("ask_repository", body_message, counts)["max_output"]:
+        return CONTEXT_OVERFLOW_ERROR
+
+    if stream:
+        return _stream_completion(client, body_message, error_prefix="Erro ao consultar a IA")
 
     try:
-        with st.spinner('Consultando o repositório...'):
-            response_api = requests.post(api_url, headers=headers_api, json=body_message)
-            response_api.raise_for_status()
-            resposta = response_api.json()['choices'][0]['message']['content']
-            return resposta
+        with _spinner('Consultando o repositório...'):
+            return _request_completion(client, body_message)
     except Exception as e:
         return f"Erro ao consultar a IA: {str(e)}"
+
+
+def remember_chat_turn(chat, question, answer, model="gpt-4o-mini"):
+    """
+    Registra a troca no estado da conversa.
+
+    Quando as trocas na íntegra enchem a janela, as mais antigas são incorporadas
+    à memória resumida em segundo plano; a pergunta seguinte não espera por isso.
+    """
+    chat.add_turn(question, answer)
+    old_turns = chat.turns_to_compress()
+    if not old_turns:
+        return
+    try:
+        api_key = st.secrets["openai"]["api_key"]
+    except Exception:
+        return # Sem chave, as trocas continuam na íntegra (e o orçamento corta as mais antigas)
+    summarize = _memory_summarizer(get_http_client(api_key), model)
+    future = get_ai_executor().submit(compress_memory, chat.memory, list(old_turns), summarize)
+    chat.start_compression(future, len(old_turns))
+
+
+def summarize_repository_async(content, additional_instructions=None, model="gpt-4o-mini"):
+    """Versão de summarize_repository executada no pool compartilhado (retorna Future[str])."""
+    return _submit(summarize_repository, content, additional_instructions=additional_instructions, model=model)
+
+def summarize_meeting_description_async(description, history, additional_instructions=None, model="gpt-4o-mini"):
+    """Versão de summarize_meeting_description executada no pool compartilhado (retorna Future[str])."""
+    return _submit(
+        summarize_meeting_description, description, history,
+        additional_instructions=additional_instructions, model=model,
+    )
+
+def ask_repository_async(content, question, model="gpt-4o-mini"):
+    """Versão de ask_repository executada no pool compartilhado (retorna Future[str])."""
+    return _submit(ask_repository, content, question, model=model)
@@ -0,0 +1,167 @@
+import re
+from datetime import datetime, time as time_type
+
+from pymongo import DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+
+from notepad_archive import ENTRY_PROJECTION
+from retrieval import normalize_text, STOPWORDS
+from metrics import instrumented
+
+TEXT_INDEX_NAME = "entradas_texto"
+SEARCH_PAGE_SIZE = 10
+SNIPPET_CHARS = 240
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Variantes acentuadas de cada letra, para a busca por regex casar "orcamento" com "Orçamento"
+_ACCENT_CLASSES = {
+    "a": "aáàâãä", "c": "cç", "e": "eéèêë", "i": "iíìîï",
+    "n": "nñ", "o": "oóòôõö", "u": "uúùûü",
+}
+
+
+def ensure_text_index(collection):
+    """Índice de texto (português) sobre título, usuário e corpo das entradas."""
+    collection.create_index(
+        [("title", TEXT), ("user", TEXT), ("body", TEXT)],
+        name=TEXT_INDEX_NAME,
+        default_language="portuguese",
+        weights={"title": 5, "user": 3, "body": 1},
+    )
+
+
+def query_terms(query):
+    """Termos da busca normalizados (sem acentos e sem stopwords), em ordem."""
+    terms = []
+    for word in _WORD_RE.findall(normalize_text(query)):
+        if len(word) > 1 and word not in STOPWORDS and word not in terms:
+            terms.append(word)
+    return terms
+
+
+def _term_prefixes(terms):
+    # Aproxima o stemming do índice: "reuniões" deve destacar "reunião"
+    return [term[:max(4, len(term) - 2)] if len(term) > 4 else term for term in terms]
+
+
+def highlight_snippet(text, terms, max_chars=SNIPPET_CHARS):
+    """
+    Trecho do texto em torno da primeira ocorrência, com os termos em **negrito**.
+
+    Args:
+        text (str): Texto completo da entrada.
+        terms (list[str]): Termos normalizados da busca.
+        max_chars (int): Tamanho aproximado do trecho.
+
+    Returns:
+        str: Trecho em Markdown.
+    """
+    prefixes = _term_prefixes(terms)
+    hits = [
+        match for match in _WORD_RE.finditer(text)
+        if any(normalize_text(match.group()).startswith(prefix) for prefix in prefixes)
+    ]
+    if not hits:
+        return text[:max_chars] + ("…" if len(text) > max_chars else "")
+
+    start = max(0, hits[0].start() - max_chars // 3)
+    end = min(len(text), start + max_chars)
+    if start > 0:
+        # Começa em uma fronteira de palavra
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < hits[0].start() else start
+
+    parts, cursor = [], start
+    for match in hits:
+        if match.start() < start or match.end() > end:
+            continue
+        parts.append(text[cursor:match.start()])
+        parts.append(f"**{match.group()}**")
+        cursor = match.end()
+    parts.append(text[cursor:end])
+    snippet = "".join(parts).replace("\n", " ")
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+def _filters(user=None, title=None, date_from=None, date_to=None):
+    query = {}
+    if user:
+        query["user"] = user
+    if title:
+        query["title"] = {"$regex": re.escape(title), "$options": "i"}
+    if date_from or date_to:
+        query["timestamp"] = {}
+        if date_from:
+            query["timestamp"]["$gte"] = datetime.combine(date_from, time_type.min)
+        if date_to:
+            query["timestamp"]["$lte"] = datetime.combine(date_to, time_type.max)
+    return query
+
+
+def _accent_insensitive(term):
+    """Regex do termo normalizado que também casa as formas acentuadas."""
+    return "".join(
+        f"[{_ACCENT_CLASSES[char]}]" if char in _ACCENT_CLASSES else re.escape(char)
+        for char in term
+    )
+
+
+def _regex_search(collection, terms, filters, skip, limit):
+    """Alternativa sem índice de texto (ex.: mongomock): regex por termo, pontuação calculada aqui."""
+    pattern = "|".join(_accent_insensitive(prefix) for prefix in _term_prefixes(terms))
+    query = dict(filters)
+    query["$or"] = [{field: {"$regex": pattern, "$options": "i"}} for field in ("title", "user", "body")]
+    scored = []
+    for entry in collection.find(query, ENTRY_PROJECTION):
+        haystack = normalize_text(f"{entry.get('title', '')} {entry.get('user', '')} {entry.get('body', '')}")
+        entry["score"] = sum(haystack.count(prefix) for prefix in _term_prefixes(terms))
+        scored.append(entry)
+    scored.sort(key=lambda e: (e["score"], e["timestamp"]), reverse=True)
+    return scored[skip:skip + limit]
+
+
+@instrumented("mongo.search_archive")
+def search_archive(collection, query, user=None, title=None, date_from=None, date_to=None,
+                   page=0, page_size=SEARCH_PAGE_SIZE):
+    """
+    Busca textual no histórico, ordenada por relevância, com filtros e paginação.
+
+    Args:
+        collection: Coleção de entradas.
+        query (str): Texto buscado.
+        user (str, optional): Usuário exato.
+        title (str, optional): Parte do título (sem diferenciar maiúsculas).
+        date_from (date, optional): Data inicial (inclusive).
+        date_to (date, optional): Data final (inclusive).
+        page (int): Página (a partir de 0).
+        page_size (int): Resultados por página.
+
+    Returns:
+        tuple[list[dict], bool]: Resultados (com score e snippet) e se há próxima página.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return [], False
+
+    filters = _filters(user, title, date_from, date_to)
+    skip = page * page_size
+    try:
+        text_query = dict(filters)
+        text_query["$text"] = {"$search": query, "$language": "portuguese"}
+        projection = dict(ENTRY_PROJECTION, score={"$meta": "textScore"})
+        results = list(collection.find(
+            text_query,
+            projection,
+            sort=[("score", {"$meta": "textScore"}), ("timestamp", DESCENDING)],
+            skip=skip,
+            limit=page_size + 1,
+        ))
+    except (NotImplementedError, OperationFailure):
+        results = _regex_search(collection, terms, filters, skip, page_size + 1)
+
+    has_more = len(results) > page_size
+    results = results[:page_size]
+    for entry in results:
+        entry["snippet"] = highlight_snippet(entry["body"], terms)
+    return results, has_more
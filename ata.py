@@ -0,0 +1,251 @@
+import csv
+import io
+import json
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date as date_type, datetime, time as time_type
+
+from pdf_export import build_pdf
+
+# Abaixo deste número de atas não compensa abrir um pool de processos
+MIN_BATCH_FOR_POOL = 4
+
+# Formato de cada ação em CSV: "tarefa | responsável | prazo", separadas por ";" ou quebra de linha
+ACTION_FIELDS = ("Tarefa", "Responsável", "Prazo")
+_ACTION_ALIASES = {
+    "Tarefa": ("Tarefa", "tarefa", "task", "descricao", "descrição"),
+    "Responsável": ("Responsável", "Responsavel", "responsavel", "responsável", "owner"),
+    "Prazo": ("Prazo", "prazo", "deadline"),
+}
+_LIST_SPLIT_RE = re.compile(r"[;\n]")
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date_type):
+        return value
+    value = str(value or "").strip()
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: '{value}' (use dd/mm/aaaa ou aaaa-mm-dd)")
+
+
+def _parse_time(value):
+    if isinstance(value, time_type):
+        return value
+    value = str(value or "").strip()
+    return datetime.strptime(value, "%H:%M").time() if value else None
+
+
+def _parse_list(value):
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in _LIST_SPLIT_RE.split(str(value or "")) if item.strip()]
+
+
+def _parse_actions(value):
+    """Aceita lista de dicionários (JSON) ou texto "tarefa | responsável | prazo; ..." (CSV)."""
+    actions = []
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            if isinstance(item, dict):
+                actions.append({
+                    field: str(next((item[a] for a in _ACTION_ALIASES[field] if a in item), "")).strip()
+                    for field in ACTION_FIELDS
+                })
+            else:
+                actions.extend(_parse_actions(str(item)))
+        return actions
+    for line in _parse_list(value):
+        parts = [part.strip() for part in line.split("|")] + ["", ""]
+        actions.append(dict(zip(ACTION_FIELDS, parts[:3])))
+    return actions
+
+
+def normalize_meeting(raw):
+    """
+    Converte um registro de entrada (CSV/JSON ou formulário) no formato usado pela ata.
+
+    Campos: topic, date, time, location, organizer, attendees, absent, agenda,
+    discussion e actions. Apenas topic e date são obrigatórios.
+    """
+    topic = str(raw.get("topic") or "").strip()
+    if not topic:
+        raise ValueError("Assunto da reunião (topic) não informado.")
+    return {
+        "topic": topic,
+        "date": _parse_date(raw.get("date")),
+        "time": _parse_time(raw.get("time")),
+        "location": str(raw.get("location") or "").strip(),
+        "organizer": str(raw.get("organizer") or "").strip(),
+        "attendees": _parse_list(raw.get("attendees")),
+        "absent": _parse_list(raw.get("absent")),
+        "agenda": str(raw.get("agenda") or "").strip(),
+        "discussion": str(raw.get("discussion") or "").strip(),
+        "actions": _parse_actions(raw.get("actions") or []),
+    }
+
+
+def build_ata_markdown(meeting):
+    """Monta o texto Markdown da ata a partir de uma reunião normalizada."""
+    attendees_list = meeting["attendees"]
+    absent_list = meeting["absent"]
+    time_str = meeting["time"].strftime("%H:%M") if meeting["time"] else ""
+
+    md_output = f"""# Ata de Reunião: {meeting['topic']}
+
+**Data:** {meeting['date'].strftime("%d/%m/%Y")}  
+**Horário:** {time_str}  
+**Local:** {meeting['location']}  
+**Organizador:** {meeting['organizer']}
+
+---
+
+## 👥 Participantes
+**Presentes:**
+{chr(10).join([f'- {p}' for p in attendees_list]) if attendees_list else '- (Nenhum listado)'}
+
+**Ausentes:**
+{chr(10).join([f'- {p}' for p in absent_list]) if absent_list else '- (Nenhum)'}
+
+---
+
+## 📅 Pauta / Agenda
+{meeting['agenda'] if meeting['agenda'] else 'Não especificada.'}
+
+---
+
+## 📝 Discussão e Decisões
+{meeting['discussion'] if meeting['discussion'] else 'Nenhuma nota registrada.'}
+
+---
+
+## ✅ Ações / Próximos Passos
+"""
+    if meeting["actions"]:
+        for idx, action in enumerate(meeting["actions"], 1):
+            md_output += f"{idx}. **{action['Tarefa']}** - Resp: {action['Responsável']} (Até: {action['Prazo']})\n"
+    else:
+        md_output += "Nenhuma ação definida.\n"
+
+    md_output += "\n---\n*Gerado por Aurelius*"
+    return md_output
+
+
+def ata_pdf_header(meeting):
+    """Título e subtítulo usados no PDF da ata."""
+    time_str = meeting["time"].strftime("%H:%M") if meeting["time"] else ""
+    title = f"Ata de Reunião: {meeting['topic']}"
+    subtitle = (
+        f"Data: {meeting['date'].strftime('%d/%m/%Y')}\n"
+        f"Horário: {time_str}\n"
+        f"Local: {meeting['location']}\n"
+        f"Organizador: {meeting['organizer']}"
+    )
+    return title, subtitle
+
+
+def ata_file_stem(meeting):
+    """Nome base dos arquivos da ata (mesmo padrão do download individual)."""
+    topic = re.sub(r'[\\/:*?"<>|]', "-", meeting["topic"]).replace(" ", "_")
+    return f"Ata_{topic}_{meeting['date']}"
+
+
+def render_ata(meeting):
+    """Gera Markdown e PDF de uma reunião normalizada (executado nos processos do pool)."""
+    md_output = build_ata_markdown(meeting)
+    title, subtitle = ata_pdf_header(meeting)
+    return ata_file_stem(meeting), md_output, build_pdf(title, subtitle, md_output)
+
+
+def load_meetings(data, filename):
+    """
+    Lê as reuniões de um arquivo CSV ou JSON.
+
+    Args:
+        data (bytes | str): Conteúdo do arquivo.
+        filename (str): Nome do arquivo (a extensão define o formato).
+
+    Returns:
+        list[dict]: Reuniões normalizadas.
+
+    Raises:
+        ValueError: Formato não suportado ou registro inválido (com o número do registro).
+    """
+    text = data.decode("utf-8-sig") if isinstance(data, bytes) else data
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".json":
+        records = json.loads(text)
+        if isinstance(records, dict):
+            records = records.get("meetings", [records])
+        if not isinstance(records, list):
+            raise ValueError("O JSON deve conter uma lista de reuniões")
+    elif extension == ".csv":
+        try:
+            dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        records = list(csv.DictReader(io.StringIO(text), dialect=dialect))
+    else:
+        raise ValueError("Formato não suportado: use um arquivo .csv ou .json")
+
+    meetings = []
+    for idx, record in enumerate(records, 1):
+        if not isinstance(record, dict):
+            raise ValueError(f"Registro {idx}: esperado um objeto com os campos da reunião")
+        try:
+            meetings.append(normalize_meeting({str(k).strip().lower(): v for k, v in record.items()}))
+        except ValueError as e:
+            raise ValueError(f"Registro {idx}: {e}") from e
+    return meetings
+
+
+def generate_atas_zip(meetings, max_workers=None):
+    """
+    Gera Markdown e PDF de todas as reuniões em paralelo e empacota tudo em um ZIP.
+
+    Args:
+        meetings (list[dict]): Reuniões normalizadas (ver load_meetings).
+        max_workers (int, optional): Processos do pool (padrão: número de CPUs).
+
+    Returns:
+        bytes: Conteúdo do arquivo ZIP.
+    """
+    if len(meetings) >= MIN_BATCH_FOR_POOL and (max_workers or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(render_ata, meetings, chunksize=max(1, len(meetings) // 32)))
+    else:
+        results = [render_ata(meeting) for meeting in meetings]
+
+    buffer = io.BytesIO()
+    used_names = {}
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for stem, md_output, pdf in results:
+            count = used_names.get(stem, 0)
+            used_names[stem] = count + 1
+            name = f"{stem}_{count + 1}" if count else stem
+            archive.writestr(f"{name}.md", md_output)
+            archive.writestr(f"{name}.pdf", pdf)
+    return buffer.getvalue()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gera atas em lote (Markdown + PDF) a partir de um CSV ou JSON.")
+    parser.add_argument("input", help="Arquivo .csv ou .json com as reuniões")
+    parser.add_argument("-o", "--output", default="atas.zip", help="Arquivo ZIP de saída (padrão: atas.zip)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Processos em paralelo (padrão: CPUs)")
+    args = parser.parse_args()
+
+    with open(args.input, "rb") as input_file:
+        loaded = load_meetings(input_file.read(), args.input)
+    with open(args.output, "wb") as output_file:
+        output_file.write(generate_atas_zip(loaded, max_workers=args.workers))
+    print(f"{len(loaded)} atas geradas em {args.output}")
@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_ANSWER = (
+    "Resumo: o orçamento foi aprovado, as matrículas seguem em análise e a reforma do prédio "
+    "ficou para o próximo trimestre. Responsáveis e prazos constam no histórico."
+)
+
+
+class FakeOpenAI:
+    """
+    Endpoint local compatível com /v1/chat/completions (com e sem stream), com latência configurável.
+
+    Args:
+        latency (float): Espera antes da resposta (segundos), simulando a fila e o tempo até o primeiro token.
+        token_latency (float): Espera entre os tokens em respostas com stream.
+        answer (str): Texto devolvido em todas as respostas.
+        port (int): Porta local (0 escolhe uma livre).
+    """
+
+    def __init__(self, latency=0.3, token_latency=0.0, answer=DEFAULT_ANSWER, port=0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.answer = answer
+        self.requests = 0
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with fake._lock:
+                    fake.requests += 1
+                    fake.active += 1
+                    fake.peak_active = max(fake.peak_active, fake.active)
+                try:
+                    time.sleep(fake.latency)
+                    prompt_chars = sum(len(m.get("content", "")) for m in payload.get("messages", []))
+                    usage = {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(fake.answer) // 4}
+                    if payload.get("stream"):
+                        self._stream(usage)
+                    else:
+                        self._send(200, "application/json", json.dumps({
+                            "choices": [{"message": {"role": "assistant", "content": fake.answer}}],
+                            "usage": usage,
+                        }).encode("utf-8"))
+                finally:
+                    with fake._lock:
+                        fake.active -= 1
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, usage):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                events = [{"choices": [{"delta": {"content": f"{word} "}}]} for word in fake.answer.split()]
+                events.append({"choices": [], "usage": usage})
+                for event in events:
+                    self._chunk(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    if fake.token_latency:
+                        time.sleep(fake.token_latency)
+                self._chunk(b"data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _chunk(self, data):
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Endpoint local que imita a API de chat da OpenAI.")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.3, help="Segundos antes de cada resposta")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Segundos entre tokens (stream)")
+    args = parser.parse_args()
+
+    server = FakeOpenAI(latency=args.latency, token_latency=args.token_latency, port=args.port)
+    print(f"Servindo em {server.base_url} (Ctrl+C para sair)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,407 @@
+"""
+Benchmark do Aurelius com MongoDB e OpenAI locais.
+
+Gera um histórico sintético, mede as operações principais (save, carga do
+histórico, busca, montagem de prompt, PDF e chamadas à IA), simula sessões
+simultâneas com o AppTest do Streamlit e grava um relatório JSON que pode ser
+comparado entre versões.
+
+Uso (na raiz do repositório, após pip install -r benchmarks/requirements.txt):
+    python -m benchmarks.run --entries 10000 --output baseline.json
+    python -m benchmarks.run --entries 100000 --mongo-uri mongodb://localhost:27017 --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from unittest.mock import patch
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_openai import FakeOpenAI
+from benchmarks.synthetic_archive import populate, synthetic_body
+from local_storage import DATA_DIR_ENV
+
+BENCH_DATABASE = "AURELIUS_BENCH"
+BENCH_API_KEY = "sk-benchmark"
+
+# Mediana acima deste aumento (em relação ao relatório de base) é sinalizada como regressão
+REGRESSION_THRESHOLD = 0.20
+
+QUERIES = [
+    "orçamento da unidade centro", "prazo das matrículas", "reforma do prédio",
+    "contratação de professores", "quem é responsável pelo sistema acadêmico",
+]
+
+
+def open_database(mongo_uri=None):
+    """Base de benchmark vazia: mongod local (se informado) ou mongomock."""
+    if mongo_uri:
+        from pymongo import MongoClient
+        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
+        client.drop_database(BENCH_DATABASE)
+        return client[BENCH_DATABASE], "mongod"
+    import mongomock
+    return mongomock.MongoClient()[BENCH_DATABASE], "mongomock"
+
+
+def install_environment(db, fake):
+    """
+    Aponta o app para a base e a API locais.
+
+    mongodb_config é substituído por um módulo equivalente que devolve a base de
+    benchmark, e os secrets passam a indicar o endpoint falso da OpenAI. Os dados
+    locais (fila de saves, cópia do histórico, cache de PDFs) vão para um diretório
+    temporário próprio, sem tocar nos arquivos do app real.
+    """
+    os.environ[DATA_DIR_ENV] = tempfile.mkdtemp(prefix="aurelius_bench_data_")
+    config = types.ModuleType("mongodb_config")
+    config.get_database = lambda: db
+    config.database_ready = lambda force=False: True
+    sys.modules["mongodb_config"] = config
+
+    secrets = {"openai": {"api_key": BENCH_API_KEY, "base_url": fake.base_url}}
+    secrets_path = os.path.join(tempfile.mkdtemp(prefix="aurelius_bench_"), "secrets.toml")
+    with open(secrets_path, "w", encoding="utf-8") as secrets_file:
+        secrets_file.write(f'[openai]\napi_key = "{BENCH_API_KEY}"\nbase_url = "{fake.base_url}"\n')
+    from streamlit import config as st_config
+    st_config.set_option("secrets.files", [secrets_path])
+    return secrets
+
+
+def summarize_durations(durations):
+    """Estatísticas (ms) de uma lista de durações em segundos."""
+    ordered = sorted(durations)
+    return {
+        "samples": len(ordered),
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+class Bench:
+    """Executa e registra os cenários."""
+
+    def __init__(self):
+        self.results = {}
+
+    def measure(self, name, function, repeat=1):
+        durations = []
+        for idx in range(repeat):
+            start = time.perf_counter()
+            function(idx)
+            durations.append(time.perf_counter() - start)
+        self.results[name] = summarize_durations(durations)
+        print(f"  {name:<32} mediana {self.results[name]['median_ms']:>10.1f} ms  ({repeat}x)", flush=True)
+
+    def record(self, name, durations):
+        if durations:
+            self.results[name] = summarize_durations(durations)
+            print(f"  {name:<32} mediana {self.results[name]['median_ms']:>10.1f} ms  ({len(durations)}x)", flush=True)
+
+
+def run_storage(bench, db, entries, repeat):
+    from archive_search import ensure_text_index, search_archive
+    from digests import load_digested_history
+    from notepad_archive import build_entry, fetch_entries_page, format_entries, get_entries_collection
+    from save_queue import SaveQueue
+    from search_index import index_entry, rebuild_index, search_entries
+
+    collection = get_entries_collection(db)
+    print(f"Gerando {entries} entradas sintéticas...", flush=True)
+    bench.measure("setup.populate", lambda _: populate(collection, entries))
+    bench.measure("setup.text_index", lambda _: ensure_text_index(collection))
+    bench.measure("setup.search_index", lambda _: rebuild_index(db))
+
+    # Save como no app: fila local, envio em segundo plano e indexação após o envio
+    indexed = threading.Condition()
+    indexed_ids = set()
+
+    def on_flushed(batch):
+        for entry in batch:
+            index_entry(db, entry)
+        with indexed:
+            indexed_ids.update(entry["_id"] for entry in batch)
+            indexed.notify_all()
+
+    save_queue = SaveQueue(lambda: collection, on_flushed=on_flushed)
+
+    def save(idx):
+        entry = save_queue.enqueue(build_entry(
+            f"Nota de benchmark {idx}: {synthetic_body(random.Random(idx))}", user="Benchmark", title="Carga",
+        ))
+        with indexed:
+            indexed.wait_for(lambda: entry["_id"] in indexed_ids, timeout=30)
+
+    bench.measure("save.queued_and_indexed", save, repeat=repeat)
+    save_queue.close()
+    bench.measure("history.first_page", lambda _: fetch_entries_page(collection), repeat=repeat)
+
+    def paginate(_):
+        before = None
+        for _ in range(10):
+            page, has_more = fetch_entries_page(collection, before=before)
+            if not has_more:
+                break
+            before = page[0]
+
+    bench.measure("history.ten_pages", paginate, repeat=max(1, repeat // 5))
+    bench.measure("history.digested", lambda _: load_digested_history(db))
+    bench.measure("search.inverted_index", lambda idx: search_entries(db, QUERIES[idx % len(QUERIES)]), repeat=repeat)
+    bench.measure("search.text", lambda idx: search_archive(collection, QUERIES[idx % len(QUERIES)]), repeat=repeat)
+
+    def relevant_history(query):
+        found = search_entries(db, query)
+        found.sort(key=lambda e: (e["timestamp"], e["_id"]))
+        return format_entries(found)
+
+    bench.measure("search.relevant_history", lambda idx: relevant_history(QUERIES[idx % len(QUERIES)]), repeat=repeat)
+    return collection, relevant_history
+
+
+def run_prompt_and_pdf(bench, collection, relevant_history, repeat, pdf_entries):
+    from ai_summary import PROMPT_BUDGETS, _cargos_section, _history_section
+    from notepad_archive import format_header, iter_all_entries
+    from pdf_export import build_pdf
+    from retrieval import select_context
+    from token_budget import Section, fit_sections, CHARS_PER_TOKEN_CEILING
+
+    budget = PROMPT_BUDGETS["ask_repository"]
+    histories = [relevant_history(query) for query in QUERIES]
+
+    def build_prompt(idx):
+        query = QUERIES[idx % len(QUERIES)]
+        context = select_context(histories[idx % len(QUERIES)], query, max_chars=budget["history"] * CHARS_PER_TOKEN_CEILING)
+        fit_sections([
+            Section("question", query, budget["question"], priority=0),
+            _history_section(context, budget["history"], priority=1),
+            _cargos_section("", budget["cargos"], priority=2),
+        ], budget["total"])
+
+    bench.measure("prompt.ask_repository", build_prompt, repeat=repeat)
+
+    def pdf_lines():
+        for entry in islice(iter_all_entries(collection), pdf_entries):
+            yield format_header(entry)
+            yield entry["body"]
+            yield ""
+
+    bench.measure(f"pdf.build_{pdf_entries}_entries", lambda _: build_pdf("Relatório", "Benchmark", pdf_lines()))
+    return histories
+
+
+def run_ai(bench, histories, repeat, concurrency):
+    from ai_summary import ask_repository, ask_repository_async, summarize_meeting_description
+
+    stamp = time.time_ns() # Perguntas únicas: o cache de respostas não pode mascarar a ida à API
+    bench.measure(
+        "ai.ask_repository",
+        lambda idx: ask_repository(histories[idx % len(histories)], f"{QUERIES[idx % len(QUERIES)]} ({stamp}-{idx})"),
+        repeat=repeat,
+    )
+    bench.measure(
+        "ai.ask_repository_stream",
+        lambda idx: "".join(ask_repository(histories[idx % len(histories)], f"stream {stamp}-{idx}", stream=True)),
+        repeat=repeat,
+    )
+    bench.measure(
+        "ai.summarize_description",
+        lambda idx: summarize_meeting_description(f"{synthetic_body(random.Random(idx))} ({stamp}-{idx})",
+                                                  histories[idx % len(histories)]),
+        repeat=repeat,
+    )
+
+    def parallel(idx):
+        futures = [
+            ask_repository_async(histories[n % len(histories)], f"paralela {stamp}-{idx}-{n}")
+            for n in range(concurrency)
+        ]
+        for future in futures:
+            future.result()
+
+    bench.measure(f"ai.parallel_{concurrency}_questions", parallel, repeat=max(1, repeat // 5))
+
+
+def run_session(secrets, idx):
+    """Uma sessão simulada: abre o app, salva uma nota e faz uma pergunta ao chat."""
+    from streamlit.testing.v1 import AppTest
+
+    timings = {}
+    app = AppTest.from_file(os.path.join(REPO_ROOT, "Aurelius.py"), default_timeout=300)
+    for section, values in secrets.items():
+        app.secrets[section] = values
+
+    def step(name, action):
+        start = time.perf_counter()
+        action()
+        timings[name] = time.perf_counter() - start
+
+    step("session.open", app.run)
+    step("session.notepad", lambda: app.sidebar.radio[0].set_value("Bloco de Notas").run())
+
+    def save():
+        app.text_area(key="new_archive_input").set_value(f"Sessão {idx}: {synthetic_body(random.Random(idx))}").run()
+        next(b for b in app.button if "Salvar" in b.label).click().run()
+
+    step("session.save", save)
+
+    def chat():
+        app.text_input(key="repo_chat_question").set_value(f"O que foi decidido sobre o orçamento? ({idx})").run()
+        next(b for b in app.button if "Enviar" in b.label).click().run()
+
+    step("session.chat", chat)
+    return timings, [str(e.value) for e in app.exception]
+
+
+@contextmanager
+def shared_test_runtime():
+    """
+    Prepara o AppTest para sessões simultâneas na mesma thread principal.
+
+    Cada AppTest apaga o Runtime simulado ao terminar uma execução; sem isso, a
+    sessão que termina primeiro derruba as execuções ainda em curso nas outras.
+    A compilação do script também é serializada (ast.parse em várias threads ao
+    mesmo tempo falha no Python 3.11).
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    last = {}
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def instance(cls):
+        if cls._instance is not None:
+            last["runtime"] = cls._instance
+        return cls._instance or last["runtime"]
+
+    def serialized_get_bytecode(self, script_path):
+        with compile_lock:
+            return get_bytecode(self, script_path)
+
+    with patch.object(Runtime, "instance", classmethod(instance)), \
+            patch.object(ScriptCache, "get_bytecode", serialized_get_bytecode):
+        yield
+
+
+def run_sessions(bench, secrets, sessions):
+    with shared_test_runtime(), ThreadPoolExecutor(max_workers=sessions) as executor:
+        outcomes = list(executor.map(lambda idx: run_session(secrets, idx), range(sessions)))
+    errors = [error for _, session_errors in outcomes for error in session_errors]
+    for name in outcomes[0][0]:
+        bench.record(f"{name}_x{sessions}", [timings[name] for timings, _ in outcomes])
+    return errors
+
+
+def compare_reports(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Compara as medianas com um relatório anterior.
+
+    Returns:
+        list[str]: Cenários com regressão acima do limite.
+    """
+    regressions = []
+    print(f"\n{'cenário':<36}{'base (ms)':>12}{'atual (ms)':>12}{'variação':>10}")
+    for name, stats in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base or not base["median_ms"]:
+            continue
+        change = stats["median_ms"] / base["median_ms"] - 1
+        flag = "  ⚠" if change > threshold else ""
+        print(f"{name:<36}{base['median_ms']:>12.1f}{stats['median_ms']:>12.1f}{change:>+10.0%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do Aurelius com MongoDB e OpenAI locais.")
+    parser.add_argument("--entries", type=int, default=10000, help="Entradas no histórico sintético (10k a 1M)")
+    parser.add_argument("--mongo-uri", default=None, help="mongod local (padrão: mongomock em memória)")
+    parser.add_argument("--latency", type=float, default=0.3, help="Latência da API falsa (segundos)")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Espera entre tokens no stream (segundos)")
+    parser.add_argument("--repeat", type=int, default=20, help="Repetições de cada cenário")
+    parser.add_argument("--pdf-entries", type=int, default=2000, help="Entradas incluídas no PDF medido")
+    parser.add_argument("--concurrency", type=int, default=8, help="Perguntas simultâneas no cenário paralelo")
+    parser.add_argument("--sessions", type=int, default=4, help="Sessões simultâneas no AppTest (0 desativa)")
+    parser.add_argument("--skip-ai", action="store_true", help="Não mede as chamadas à IA")
+    parser.add_argument("--output", default="benchmark_report.json", help="Relatório JSON de saída")
+    parser.add_argument("--compare", default=None, help="Relatório de base para comparação")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Sai com código 1 se houver regressão")
+    args = parser.parse_args(argv)
+
+    db, backend = open_database(args.mongo_uri)
+    bench = Bench()
+    with FakeOpenAI(latency=args.latency, token_latency=args.token_latency) as fake:
+        secrets = install_environment(db, fake)
+        from metrics import REGISTRY
+        REGISTRY.reset()
+
+        collection, relevant_history = run_storage(bench, db, args.entries, args.repeat)
+        histories = run_prompt_and_pdf(bench, collection, relevant_history, args.repeat, args.pdf_entries)
+        if not args.skip_ai:
+            run_ai(bench, histories, args.repeat, args.concurrency)
+        session_errors = run_sessions(bench, secrets, args.sessions) if args.sessions else []
+
+        report = {
+            "meta": {
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "revision": git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "backend": backend,
+                "entries": args.entries,
+                "latency": args.latency,
+                "token_latency": args.token_latency,
+                "repeat": args.repeat,
+                "sessions": args.sessions,
+            },
+            "scenarios": bench.results,
+            "operations": REGISTRY.snapshot(),
+            "fake_openai": {"requests": fake.requests, "peak_concurrent": fake.peak_active},
+            "session_errors": session_errors,
+        }
+
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, ensure_ascii=False, indent=2)
+    print(f"\nRelatório gravado em {args.output}")
+    if session_errors:
+        print(f"{len(session_errors)} erro(s) nas sessões simuladas: {session_errors[:3]}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            regressions = compare_reports(report, json.load(baseline_file))
+        if regressions:
+            print(f"\nRegressões acima de {REGRESSION_THRESHOLD:.0%}: {', '.join(regressions)}")
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Teste de estresse dos saves do histórico: dispara centenas de saves em paralelo
+pela fila local (save_queue.SaveQueue, como no botão "Salvar no Histórico") e
+confere que nenhuma entrada se perdeu nem foi duplicada, e que o índice de busca
+contou todas.
+
+Roda contra um mongod local: só ele comprova a atomicidade do lado do servidor.
+Sem mongod acessível, o teste é pulado. --mongomock roda apenas como teste de
+fumaça (o mongomock não é thread-safe e pode falhar sem haver defeito no app).
+
+Uso (na raiz do repositório):
+    python -m benchmarks.stress_saves --saves 500 --workers 64
+    python -m benchmarks.stress_saves --mongo-uri mongodb://outro-host:27017
+    python -m benchmarks.stress_saves --mongomock --saves 50 --workers 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from pymongo.errors import PyMongoError
+
+from benchmarks.run import open_database
+from notepad_archive import build_entry, get_entries_collection
+from save_queue import SaveQueue
+from search_index import INDEX_COLLECTION, META_COLLECTION, STATS_ID, index_entry
+
+
+DEFAULT_MONGO_URI = "mongodb://localhost:27017"
+
+
+def stress_saves(db, saves=500, workers=64):
+    """
+    Executa os saves simultâneos e verifica o resultado.
+
+    Os saves são confirmados pela fila local; o tempo total inclui o envio
+    completo da fila ao banco e a indexação.
+
+    Returns:
+        list[str]: Problemas encontrados (vazia se tudo foi gravado corretamente).
+    """
+    collection = get_entries_collection(db)
+    before = collection.count_documents({})
+    start_gate = threading.Barrier(min(workers, saves))
+    queue_dir = tempfile.mkdtemp(prefix="aurelius_stress_")
+    save_queue = SaveQueue(
+        lambda: collection,
+        on_flushed=lambda entries: [index_entry(db, entry) for entry in entries],
+        path=os.path.join(queue_dir, "queue.sqlite3"),
+    )
+
+    def save(idx):
+        if idx < start_gate.parties:
+            start_gate.wait() # Os primeiros saves partem juntos, como cliques no mesmo instante
+        body = f"Estresse {idx} marcador{idx:06d}"
+        return save_queue.enqueue(build_entry(body, user=f"Usuário {idx % 7}", title="Estresse"))["_id"]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        ids = list(executor.map(save, range(saves)))
+    acknowledged = time.perf_counter() - started
+    while save_queue.pending_count():
+        time.sleep(0.05)
+    quarantined = save_queue.quarantined_count()
+    # Aguarda a indexação do último lote (on_flushed roda depois de esvaziar a fila)
+    save_queue.close()
+    elapsed = time.perf_counter() - started
+
+    problems = []
+    if len(set(ids)) != saves:
+        problems.append(f"{saves - len(set(ids))} _id(s) repetidos entre os saves")
+    stored = collection.count_documents({"title": "Estresse"})
+    if stored != saves or collection.count_documents({}) != before + saves:
+        problems.append(f"esperadas {saves} entradas novas, encontradas {stored}")
+    bodies = {doc["body"] for doc in collection.find({"title": "Estresse"}, {"body": 1})}
+    missing = [idx for idx in range(saves) if f"Estresse {idx} marcador{idx:06d}" not in bodies]
+    if missing:
+        problems.append(f"{len(missing)} entrada(s) perdida(s), ex.: {missing[:5]}")
+
+    indexed = db[INDEX_COLLECTION].find_one({"_id": "estresse"}, {"df": 1}) or {}
+    if indexed.get("df", 0) < saves:
+        problems.append(f"índice de busca com {indexed.get('df', 0)} de {saves} entradas para o termo 'estresse'")
+    stats = db[META_COLLECTION].find_one({"_id": STATS_ID}) or {}
+    if stats.get("docs", 0) < saves:
+        problems.append(f"estatísticas do índice com {stats.get('docs', 0)} documentos (esperado >= {saves})")
+
+    if quarantined:
+        problems.append(f"{quarantined} entrada(s) recusada(s) pelo banco (quarentena)")
+
+    print(f"{saves} saves confirmados na fila local em {acknowledged:.2f}s ({saves / acknowledged:.0f} saves/s)")
+    print(f"{saves} saves com {workers} threads em {elapsed:.2f}s ({saves / elapsed:.0f} saves/s)")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Saves simultâneos no histórico, verificando que nenhum se perde.")
+    parser.add_argument("--saves", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--mongo-uri", default=DEFAULT_MONGO_URI, help=f"mongod local (padrão: {DEFAULT_MONGO_URI})")
+    parser.add_argument("--mongomock", action="store_true", help="Teste de fumaça em memória (não comprova atomicidade)")
+    args = parser.parse_args(argv)
+
+    if args.mongomock:
+        db, backend = open_database(None)
+        print(f"Base: {backend} (teste de fumaça: não comprova atomicidade no servidor)")
+    else:
+        try:
+            db, backend = open_database(args.mongo_uri)
+        except PyMongoError as e:
+            print(f"PULADO: mongod indisponível em {args.mongo_uri} ({e.__class__.__name__}).")
+            return 0
+        print(f"Base: {backend} ({args.mongo_uri})")
+    problems = stress_saves(db, saves=args.saves, workers=args.workers)
+    for problem in problems:
+        print(f"FALHA: {problem}")
+    if not problems:
+        print("OK: todas as entradas gravadas e indexadas.")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
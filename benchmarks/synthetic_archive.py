@@ -0,0 +1,76 @@
+import random
+from datetime import datetime, timedelta
+
+from notepad_archive import build_entry, format_entries
+
+USERS = [
+    "Ana Souza", "Bruno Lima", "Carla Mendes", "Daniel Rocha", "Eduarda Alves",
+    "Felipe Castro", "Gabriela Nunes", "Henrique Dias", "Isabela Moura", "João Pereira",
+]
+TITLES = [
+    "Reunião de Diretoria", "Planejamento Pedagógico", "Comitê Financeiro", "Alinhamento de TI",
+    "Reunião de Coordenação", "Infraestrutura das Unidades", "Matrículas", "Recursos Humanos", "",
+]
+SUBJECTS = [
+    "orçamento", "matrículas", "calendário letivo", "reforma do prédio", "contratação de professores",
+    "sistema acadêmico", "avaliação institucional", "evento de formatura", "plano de marketing",
+    "transporte escolar", "material didático", "segurança das unidades", "bolsas de estudo",
+]
+ACTIONS = [
+    "foi aprovado", "ficou pendente", "será revisado", "precisa de aprovação da diretoria",
+    "teve o prazo estendido", "foi priorizado para o próximo trimestre", "foi cancelado",
+]
+UNITS = ["Unidade Centro", "Unidade Norte", "Unidade Sul", "Unidade Leste", "Sede"]
+
+
+def synthetic_body(rng, paragraphs=None):
+    """Texto de nota com assunto, decisão, responsável e prazo (2 a 5 parágrafos)."""
+    lines = []
+    for _ in range(paragraphs or rng.randint(2, 5)):
+        subject = rng.choice(SUBJECTS)
+        lines.append(
+            f"O tema {subject} na {rng.choice(UNITS)} {rng.choice(ACTIONS)}. "
+            f"Responsável: {rng.choice(USERS)}. Prazo: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}. "
+            f"Discutimos impactos em {rng.choice(SUBJECTS)} e {rng.choice(SUBJECTS)}."
+        )
+    return "\n\n".join(lines)
+
+
+def synthetic_entries(count, seed=42, end=None, span_days=3 * 365):
+    """
+    Gera entradas do histórico em ordem cronológica, distribuídas em span_days dias.
+
+    Args:
+        count (int): Quantidade de entradas.
+        seed (int): Semente (a mesma semente gera o mesmo histórico).
+        end (datetime, optional): Data da entrada mais recente (padrão: agora).
+        span_days (int): Período coberto pelo histórico.
+
+    Yields:
+        dict: Documentos no formato de notepad_archive.build_entry.
+    """
+    rng = random.Random(seed)
+    end = end or datetime.now().replace(microsecond=0)
+    start = end - timedelta(days=span_days)
+    step = (end - start) / max(count, 1)
+    for idx in range(count):
+        timestamp = start + step * idx + timedelta(seconds=rng.randint(0, 59))
+        yield build_entry(synthetic_body(rng), user=rng.choice(USERS), title=rng.choice(TITLES), timestamp=timestamp)
+
+
+def populate(collection, count, seed=42, batch_size=5000):
+    """Insere count entradas sintéticas na coleção em lotes (insert_many)."""
+    batch = []
+    for entry in synthetic_entries(count, seed=seed):
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+    return count
+
+
+def synthetic_history_text(count, seed=42):
+    """Histórico no formato de texto usado nos prompts (format_entries)."""
+    return format_entries(list(synthetic_entries(count, seed=seed)))
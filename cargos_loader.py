@@ -0,0 +1,132 @@
+import hashlib
+import io
+import os
+import threading
+from dataclasses import dataclass
+
+import msoffcrypto
+from openpyxl import load_workbook
+
+from colleague_directory import Colleague
+
+CARGOS_COLUMNS = ("NOME", "CARGO", "ÁREA", "UNIDADE")
+
+
+class CargosDecryptionError(Exception):
+    """A planilha protegida não pôde ser descriptografada (senha ausente ou incorreta)."""
+
+
+@dataclass(frozen=True)
+class CargosSnapshot:
+    """
+    Retrato já descriptografado da planilha de cargos, mantido apenas em memória.
+
+    Os dados ficam em formato colunar (uma tupla por coluna) e também como
+    registros tipados (Colleague), prontos para o índice de nomes.
+    """
+    source_hash: str
+    mtime_ns: int
+    size: int
+    columns: dict
+    colleagues: tuple
+
+    def __len__(self):
+        return len(self.colleagues)
+
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def _file_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _read_rows(workbook_bytes):
+    """Lê a primeira planilha com openpyxl em modo somente leitura (sem passar pelo pandas)."""
+    workbook = load_workbook(io.BytesIO(workbook_bytes), read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else "" for value in next(rows, ())]
+        positions = {name: header.index(name) for name in CARGOS_COLUMNS if name in header}
+        columns = {name: [] for name in positions}
+        for row in rows:
+            for name, pos in positions.items():
+                value = row[pos] if pos < len(row) else None
+                columns[name].append("" if value is None else str(value).strip())
+        return {name: tuple(values) for name, values in columns.items()}
+    finally:
+        workbook.close()
+
+
+def _build_snapshot(raw, stat, password):
+    if password:
+        decrypted = io.BytesIO()
+        try:
+            office_file = msoffcrypto.OfficeFile(io.BytesIO(raw))
+            office_file.load_key(password=password)
+            office_file.decrypt(decrypted)
+        except Exception as crypto_error:
+            raise CargosDecryptionError(str(crypto_error)) from crypto_error
+        workbook_bytes = decrypted.getvalue()
+    else:
+        workbook_bytes = raw
+
+    columns = _read_rows(workbook_bytes)
+    total = max((len(values) for values in columns.values()), default=0)
+
+    def value(name, idx):
+        values = columns.get(name, ())
+        return values[idx] if idx < len(values) else ""
+
+    colleagues = tuple(
+        Colleague(nome=value("NOME", i), cargo=value("CARGO", i), area=value("ÁREA", i), unidade=value("UNIDADE", i))
+        for i in range(total)
+        if value("NOME", i)
+    )
+    return CargosSnapshot(
+        source_hash=_file_hash(raw),
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+        columns=columns,
+        colleagues=colleagues,
+    )
+
+
+def load_cargos_snapshot(file_path, password=None):
+    """
+    Retorna o retrato da planilha, descriptografando-a apenas quando o arquivo muda.
+
+    A validade é verificada por mtime/tamanho (um os.stat por chamada); se eles mudarem
+    mas o conteúdo (SHA-256) for o mesmo, o retrato atual é reaproveitado.
+
+    Args:
+        file_path (str): Caminho do CARGOS.xlsx.
+        password (str, optional): Senha da planilha, se protegida.
+
+    Returns:
+        CargosSnapshot: Dados tipados da planilha.
+
+    Raises:
+        FileNotFoundError: Se o arquivo não existir.
+        CargosDecryptionError: Se a descriptografia falhar.
+    """
+    global _snapshot
+    stat = os.stat(file_path)
+    current = _snapshot
+    if current is not None and (current.mtime_ns, current.size) == (stat.st_mtime_ns, stat.st_size):
+        return current
+
+    with _lock:
+        current = _snapshot
+        if current is not None and (current.mtime_ns, current.size) == (stat.st_mtime_ns, stat.st_size):
+            return current
+
+        with open(file_path, "rb") as file:
+            raw = file.read()
+        if current is not None and current.source_hash == _file_hash(raw):
+            # Arquivo apenas "tocado": mesmo conteúdo, só atualiza a assinatura
+            _snapshot = CargosSnapshot(current.source_hash, stat.st_mtime_ns, stat.st_size, current.columns, current.colleagues)
+        else:
+            _snapshot = _build_snapshot(raw, stat, password)
+        return _snapshot
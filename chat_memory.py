@@ -0,0 +1,114 @@
+from dataclasses import dataclass, field
+
+from retrieval import tokenize
+
+# Trocas (pergunta + resposta) enviadas na íntegra a cada pergunta
+RECENT_TURNS = 3
+# Quando as trocas na íntegra chegam a este número, as mais antigas vão para a memória resumida
+COMPRESS_AT_TURNS = 2 * RECENT_TURNS
+
+MEMORY_SYSTEM_PROMPT = "Você é um assistente que mantém a memória de uma conversa de forma concisa e fiel."
+
+MEMORY_PROMPT = """
+Atualize a memória da conversa entre o usuário e o Aurélius incorporando as novas trocas.
+Preserve: assuntos tratados, fatos e respostas dadas (nomes, datas, prazos, números) e o que o usuário quer saber.
+Descarte cumprimentos e repetições. Responda apenas com a memória atualizada, em tópicos curtos.
+
+### MEMÓRIA ATUAL:
+{memory}
+
+### NOVAS TROCAS:
+{turns}
+"""
+
+
+def format_turns(turns):
+    """Trocas no formato usado nos prompts ("Usuário: ... / Aurélius: ...")."""
+    return "\n\n".join(f"Usuário: {turn['question']}\nAurélius: {turn['answer']}" for turn in turns)
+
+
+@dataclass
+class ChatState:
+    """
+    Estado comprimido da conversa: memória resumida das trocas antigas, as
+    últimas trocas na íntegra e o contexto do histórico usado na última pergunta.
+
+    Attributes:
+        memory (str): Resumo das trocas que já saíram da janela recente.
+        turns (list[dict]): Trocas recentes ({"question", "answer"}), da mais antiga para a mais nova.
+        context (str): Trechos do histórico enviados na última pergunta.
+        context_terms (frozenset[str]): Termos normalizados do contexto.
+        pending (Future, optional): Compressão em andamento (resultado: nova memória).
+        pending_count (int): Quantas das trocas mais antigas estão sendo comprimidas.
+    """
+    memory: str = ""
+    turns: list = field(default_factory=list)
+    context: str = ""
+    context_terms: frozenset = frozenset()
+    pending: object = None
+    pending_count: int = 0
+
+    def absorb(self):
+        """Aplica a compressão concluída em segundo plano (se houver), sem esperar por ela."""
+        if self.pending is None or not self.pending.done():
+            return
+        try:
+            self.memory = self.pending.result()
+            del self.turns[:self.pending_count]
+        except Exception:
+            pass # Mantém as trocas na íntegra; a próxima compressão tenta de novo
+        self.pending, self.pending_count = None, 0
+
+    def retrieval_query(self, question):
+        """Consulta de busca no histórico: a pergunta atual completada pela anterior (perguntas de seguimento)."""
+        if self.turns:
+            return f"{self.turns[-1]['question']} {question}"
+        return question
+
+    def reusable_context(self, question):
+        """
+        Contexto da pergunta anterior, se ainda se aplica à nova pergunta.
+
+        O contexto é reaproveitado quando todos os termos da pergunta já aparecem
+        nele (ex.: "E qual é o prazo?" logo após uma pergunta sobre o mesmo assunto).
+
+        Returns:
+            str | None: Contexto reaproveitável, ou None para buscar de novo.
+        """
+        if not self.context:
+            return None
+        return self.context if set(tokenize(question)) <= self.context_terms else None
+
+    def use_context(self, context):
+        """Registra o contexto enviado na pergunta atual."""
+        if context is not self.context:
+            self.context = context
+            self.context_terms = frozenset(tokenize(context))
+
+    def add_turn(self, question, answer):
+        self.turns.append({"question": question, "answer": answer})
+
+    def turns_to_compress(self):
+        """Trocas que devem ir para a memória resumida (vazio se não for a hora ou já houver compressão em andamento)."""
+        if self.pending is not None or len(self.turns) < COMPRESS_AT_TURNS:
+            return []
+        return self.turns[:len(self.turns) - RECENT_TURNS]
+
+    def start_compression(self, future, count):
+        self.pending, self.pending_count = future, count
+
+
+def compress_memory(memory, turns, summarize):
+    """
+    Incorpora trocas antigas à memória resumida.
+
+    Args:
+        memory (str): Memória atual.
+        turns (list[dict]): Trocas a incorporar.
+        summarize (Callable[[str, str], str]): Função (system, prompt) -> texto que chama a IA.
+
+    Returns:
+        str: Memória atualizada.
+    """
+    prompt = MEMORY_PROMPT.format(memory=memory or "(vazia)", turns=format_turns(turns))
+    return summarize(MEMORY_SYSTEM_PROMPT, prompt)
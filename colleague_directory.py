@@ -0,0 +1,110 @@
+import difflib
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+
+from retrieval import normalize_text
+
+# Partículas de nomes que não identificam ninguém sozinhas
+NAME_PARTICLES = frozenset({"da", "das", "de", "do", "dos", "e"})
+
+# Tamanho mínimo de um token de nome e similaridade mínima para o casamento aproximado
+MIN_NAME_TOKEN = 3
+FUZZY_CUTOFF = 0.85
+
+CONTEXT_HEADER = "Lista de Colaboradores e Cargos da Rede Lius:\n"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class Colleague:
+    """Um colaborador da planilha CARGOS.xlsx."""
+    nome: str
+    cargo: str = ""
+    area: str = ""
+    unidade: str = ""
+
+    def format_line(self):
+        return f"- {self.nome}: {self.cargo} ({self.area} - {self.unidade})"
+
+
+def _name_tokens(text):
+    return [
+        token for token in _WORD_RE.findall(normalize_text(text))
+        if len(token) >= MIN_NAME_TOKEN and token not in NAME_PARTICLES
+    ]
+
+
+class ColleagueDirectory:
+    """
+    Índice de nomes dos colaboradores, construído uma única vez a partir da planilha.
+
+    O casamento ignora acentos e maiúsculas e aceita nomes parciais ("Márcia Nóbrega",
+    "Nobrega") e pequenos erros de digitação ("Marica Nobrega").
+
+    Args:
+        colleagues (list[Colleague]): Colaboradores da planilha.
+        error (str, optional): Mensagem a ser usada no prompt quando a planilha não pôde ser lida.
+    """
+
+    def __init__(self, colleagues, error=None):
+        self.colleagues = list(colleagues)
+        self.error = error
+        self._full_names = {}
+        self._token_index = defaultdict(set)
+        for idx, colleague in enumerate(self.colleagues):
+            tokens = _name_tokens(colleague.nome)
+            if tokens:
+                self._full_names[" ".join(tokens)] = idx
+            for token in tokens:
+                self._token_index[token].add(idx)
+        self._vocabulary = list(self._token_index)
+
+    def _match_token(self, token, fuzzy=False):
+        """Colaboradores cujo nome contém o token (exato ou, se fuzzy, aproximado)."""
+        if token in self._token_index:
+            return self._token_index[token]
+        if not fuzzy or len(token) < 5:
+            return set()
+        close = difflib.get_close_matches(token, self._vocabulary, n=1, cutoff=FUZZY_CUTOFF)
+        return self._token_index[close[0]] if close else set()
+
+    def find_mentioned(self, text):
+        """
+        Identifica os colaboradores citados no texto.
+
+        Um colaborador é incluído quando seu nome completo aparece, quando ao menos dois
+        tokens do seu nome aparecem, ou quando um único token citado pertence apenas a ele.
+
+        Returns:
+            list[Colleague]: Colaboradores citados, na ordem da planilha.
+        """
+        tokens = _name_tokens(text)
+        if not tokens or not self.colleagues:
+            return []
+        # O casamento aproximado (mais caro) só é tentado em palavras com inicial maiúscula
+        capitalized = set(_name_tokens(" ".join(w for w in _WORD_RE.findall(text) if w[:1].isupper())))
+
+        normalized = f" {' '.join(tokens)} "
+        found = {idx for name, idx in self._full_names.items() if f" {name} " in normalized}
+
+        hits = defaultdict(set)
+        for token in set(tokens):
+            matched = self._match_token(token, fuzzy=token in capitalized)
+            for idx in matched:
+                hits[idx].add(token)
+            if len(matched) == 1:
+                found |= matched
+
+        found |= {idx for idx, matched_tokens in hits.items() if len(matched_tokens) >= 2}
+        return [self.colleagues[idx] for idx in sorted(found)]
+
+    def format_context(self, colleagues=None):
+        """Bloco de contexto para os prompts (todos os colaboradores se nenhuma lista for informada)."""
+        if self.error:
+            return self.error
+        colleagues = self.colleagues if colleagues is None else colleagues
+        if not colleagues:
+            return "Nenhum colaborador da lista de cargos foi identificado no conteúdo."
+        return CONTEXT_HEADER + "".join(f"{c.format_line()}\n" for c in colleagues)
@@ -0,0 +1,263 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING
+
+from notepad_archive import ENTRIES_COLLECTION, ENTRY_PROJECTION, DIGEST_PENDING_FIELD, format_entries
+from metrics import instrumented
+
+# Resumos pré-calculados do histórico (diários, semanais e mensais)
+DIGEST_COLLECTION = "repositorio_digests"
+WATERMARK_ID = "watermark"
+
+# Dias resumidos por execução no app (cada dia é uma chamada à IA); o restante fica para as
+# execuções seguintes ou para a linha de comando, que recupera todo o atraso de uma vez
+MAX_DAYS_PER_RUN = 7
+
+DAILY, WEEKLY, MONTHLY = "daily", "weekly", "monthly"
+DIGEST_TITLES = {DAILY: "Resumo diário", WEEKLY: "Resumo semanal", MONTHLY: "Resumo mensal"}
+
+_update_lock = threading.Lock()
+
+
+def _day_start(value):
+    return datetime(value.year, value.month, value.day)
+
+
+def _week_start(value):
+    return _day_start(value) - timedelta(days=value.weekday())
+
+
+def _month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def _next_month(value):
+    return datetime(value.year + (value.month == 12), value.month % 12 + 1, 1)
+
+
+def _digest_id(granularity, start):
+    return f"{granularity}:{start:%Y-%m-%d}"
+
+
+def _period_label(granularity, start):
+    if granularity == MONTHLY:
+        return start.strftime("%m/%Y")
+    if granularity == WEEKLY:
+        return f"semana de {start:%d/%m/%Y}"
+    return start.strftime("%d/%m/%Y")
+
+
+def _save_digest(collection, granularity, start, end, summary, entry_count):
+    collection.replace_one(
+        {"_id": _digest_id(granularity, start)},
+        {
+            "granularity": granularity,
+            "period_start": start,
+            "period_end": end,
+            "summary": summary,
+            "entry_count": entry_count,
+            "updated_at": datetime.now(),
+        },
+        upsert=True,
+    )
+
+
+def _get_watermark(collection):
+    doc = collection.find_one({"_id": WATERMARK_ID})
+    return doc["digested_until"] if doc else None
+
+
+def _rollup(collection, granularity, start, end, summarize):
+    """Monta um resumo semanal/mensal a partir dos resumos diários do período (se ainda não existir)."""
+    if collection.find_one({"_id": _digest_id(granularity, start)}, {"_id": 1}):
+        return False
+    dailies = list(collection.find(
+        {"granularity": DAILY, "period_start": {"$gte": start, "$lt": end}},
+        {"summary": 1, "period_start": 1, "entry_count": 1},
+        sort=[("period_start", ASCENDING)],
+    ))
+    if not dailies:
+        return False
+    text = "\n\n".join(f"#### {d['period_start']:%d/%m/%Y}\n{d['summary']}" for d in dailies)
+    summary = summarize(_period_label(granularity, start), text)
+    _save_digest(collection, granularity, start, end, summary, sum(d.get("entry_count", 0) for d in dailies))
+    return True
+
+
+@instrumented("ai.update_digests")
+def update_digests(db, summarize, now=None, max_days=MAX_DAYS_PER_RUN):
+    """
+    Atualiza os resumos de forma incremental.
+
+    Apenas dias já encerrados são resumidos (as entradas de hoje seguem "pendentes");
+    semanas e meses encerrados são consolidados a partir dos resumos diários. Cada
+    período é resumido uma única vez, então o custo acompanha apenas o que mudou.
+
+    Entradas que chegam ao banco depois de o seu dia já ter sido resumido (ex.: saves
+    que esperaram na fila local) continuam marcadas com DIGEST_PENDING_FIELD: o dia
+    delas é resumido de novo, e a semana e o mês correspondentes são refeitos.
+
+    No máximo max_days dias são resumidos por execução, dos mais antigos para os mais
+    recentes: o primeiro save depois da implantação não resume o histórico inteiro.
+
+    Args:
+        db: Base de dados do MongoDB.
+        summarize (Callable[[str, str], str]): Função que resume (período, texto).
+        now (datetime, optional): Momento de referência (padrão: agora).
+        max_days (int, optional): Limite de dias resumidos (None: todos os pendentes).
+
+    Returns:
+        int: Quantidade de resumos criados (0 se outra atualização já estava em andamento).
+    """
+    if not _update_lock.acquire(blocking=False):
+        return 0
+    try:
+        collection = db[DIGEST_COLLECTION]
+        today = _day_start(now or datetime.now())
+        watermark = _get_watermark(collection)
+
+        entries_collection = db[ENTRIES_COLLECTION]
+        query = {"timestamp": {"$lt": today}}
+        if watermark is not None:
+            query["timestamp"]["$gte"] = watermark
+        entries = entries_collection.find(query, ENTRY_PROJECTION, sort=[("timestamp", ASCENDING), ("_id", ASCENDING)])
+
+        created = 0
+        # Dias já resumidos que receberam entradas depois do resumo: refeitos com todas as entradas do dia
+        late_days = set()
+        if watermark is not None:
+            late_query = {DIGEST_PENDING_FIELD: True, "timestamp": {"$lt": watermark}}
+            late_days = {_day_start(entry["timestamp"]) for entry in entries_collection.find(late_query, {"timestamp": 1})}
+        if max_days is not None:
+            late_days = set(sorted(late_days)[:max_days])
+        remaining_days = None if max_days is None else max_days - len(late_days)
+
+        by_day = {}
+        for entry in entries:
+            day = _day_start(entry["timestamp"])
+            if day not in by_day and remaining_days is not None and len(by_day) >= remaining_days:
+                break # Os dias seguintes ficam para a próxima execução
+            by_day.setdefault(day, []).append(entry)
+        for day in late_days:
+            by_day[day] = list(entries_collection.find(
+                {"timestamp": {"$gte": day, "$lt": day + timedelta(days=1)}},
+                ENTRY_PROJECTION,
+                sort=[("timestamp", ASCENDING), ("_id", ASCENDING)],
+            ))
+
+        for day, day_entries in sorted(by_day.items()):
+            summary = summarize(_period_label(DAILY, day), format_entries(day_entries))
+            _save_digest(collection, DAILY, day, day + timedelta(days=1), summary, len(day_entries))
+            entries_collection.update_many(
+                {"_id": {"$in": [entry["_id"] for entry in day_entries]}, DIGEST_PENDING_FIELD: True},
+                {"$unset": {DIGEST_PENDING_FIELD: ""}},
+            )
+            if watermark is None or day >= watermark:
+                collection.update_one({"_id": WATERMARK_ID}, {"$set": {"digested_until": day + timedelta(days=1)}}, upsert=True)
+            created += 1
+
+        # Semanas e meses que incluem um dia refeito são consolidados de novo
+        for day in late_days:
+            collection.delete_many({"_id": {"$in": [_digest_id(WEEKLY, _week_start(day)), _digest_id(MONTHLY, _month_start(day))]}})
+
+        # Consolida semanas e meses já encerrados que ainda não têm resumo próprio
+        for granularity, period_start, period_end in (
+            (WEEKLY, _week_start, lambda start: start + timedelta(days=7)),
+            (MONTHLY, _month_start, _next_month),
+        ):
+            last = collection.find_one({"granularity": granularity}, {"period_end": 1}, sort=[("period_start", -1)])
+            query = {"granularity": DAILY}
+            if last:
+                query["period_start"] = {"$gte": last["period_end"]}
+            starts = {period_start(d["period_start"]) for d in collection.find(query, {"period_start": 1})}
+            starts.update(period_start(day) for day in late_days)
+            for start in sorted(starts):
+                if period_end(start) <= today:
+                    created += _rollup(collection, granularity, start, period_end(start), summarize)
+        return created
+    finally:
+        _update_lock.release()
+
+
+def update_digests_in_background(db, summarize):
+    """Dispara a atualização em uma thread, sem bloquear a interface."""
+    thread = threading.Thread(target=update_digests, args=(db, summarize), daemon=True)
+    thread.start()
+    return thread
+
+
+@instrumented("mongo.load_digested_history")
+def load_digested_history(db):
+    """
+    Histórico compacto: resumos pré-calculados mais as entradas ainda não resumidas.
+
+    Usa a granularidade mais grossa disponível: meses encerrados, depois semanas,
+    depois dias. Os resumos são devolvidos como entradas (com título "Resumo ...")
+    para seguirem o mesmo formato do histórico. Entradas que chegaram depois do
+    resumo do seu dia também são incluídas, até o dia ser resumido de novo.
+
+    Returns:
+        list[dict]: Entradas em ordem cronológica.
+    """
+    collection = db[DIGEST_COLLECTION]
+    projection = {"granularity": 1, "period_start": 1, "period_end": 1, "summary": 1}
+    watermark = _get_watermark(collection)
+
+    items = []
+    covered_until = None
+    for doc in collection.find({"granularity": MONTHLY}, projection, sort=[("period_start", ASCENDING)]):
+        items.append(doc)
+        covered_until = doc["period_end"]
+
+    # Depois do último mês consolidado, usa semanas quando houver e dias no restante
+    query = {"granularity": {"$in": [WEEKLY, DAILY]}}
+    if covered_until is not None:
+        query["period_start"] = {"$gte": covered_until}
+    candidates = sorted(
+        collection.find(query, projection),
+        key=lambda doc: (doc["period_start"], doc["granularity"] != WEEKLY),
+    )
+    for doc in candidates:
+        if covered_until is None or doc["period_start"] >= covered_until:
+            items.append(doc)
+            covered_until = doc["period_end"]
+
+    history = [
+        {
+            "_id": doc["_id"],
+            "timestamp": doc["period_start"],
+            "user": "",
+            "title": f"{DIGEST_TITLES[doc['granularity']]} {_period_label(doc['granularity'], doc['period_start'])}",
+            "body": doc["summary"],
+        }
+        for doc in items
+    ]
+
+    pending_query = {}
+    if watermark is not None:
+        pending_query = {"$or": [
+            {"timestamp": {"$gte": watermark}},
+            {DIGEST_PENDING_FIELD: True, "timestamp": {"$lt": watermark}},
+        ]}
+    history.extend(db[ENTRIES_COLLECTION].find(
+        pending_query, ENTRY_PROJECTION, sort=[("timestamp", ASCENDING), ("_id", ASCENDING)]
+    ))
+    history.sort(key=lambda item: item["timestamp"])
+    return history
+
+
+if __name__ == "__main__":
+    import sys
+    from mongodb_config import get_database
+    from ai_summary import get_digest_summarizer
+
+    # Uso: python digests.py [intervalo_em_segundos]  (sem intervalo, executa uma vez)
+    interval = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    while True:
+        total = update_digests(get_database(), get_digest_summarizer(), max_days=None)
+        print(f"{datetime.now():%d/%m/%Y %H:%M} - {total} resumos criados.")
+        if not interval:
+            break
+        time.sleep(interval)
@@ -0,0 +1,172 @@
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from notepad_archive import parse_legacy_archive, format_entries
+
+# Tamanho máximo de cada trecho enviado na etapa "map"
+CHUNK_MAX_CHARS = 8000
+# Tamanho máximo do material enviado na etapa "reduce" (acima disso, reduz em níveis)
+REDUCE_MAX_CHARS = 20000
+# Chamadas simultâneas à IA durante o map
+MAP_CONCURRENCY = 4
+
+# Alterar a versão invalida os resumos parciais já armazenados
+MAP_PROMPT_VERSION = "v1"
+
+SUMMARY_COLLECTION = "resumos_parciais"
+
+MAP_SYSTEM_PROMPT = "Você é um assistente executivo da Rede Lius que condensa anotações de reuniões sem perder fatos relevantes."
+
+MAP_PROMPT = """
+Resuma as anotações de reunião abaixo ({period}) em tópicos objetivos.
+Preserve: decisões tomadas, responsáveis (nomes), datas e prazos, números e pendências em aberto.
+Não invente informações e não inclua recomendações.
+
+### ANOTAÇÕES:
+{text}
+"""
+
+
+class ChunkSummaryStore:
+    """
+    Armazena os resumos parciais por hash do trecho, para que o histórico já
+    resumido nunca seja resumido de novo. Usa o MongoDB quando disponível.
+    """
+
+    def __init__(self, collection=None):
+        self.collection = collection
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+        if self.collection is not None:
+            doc = self.collection.find_one({"_id": key}, {"summary": 1})
+            if doc:
+                with self._lock:
+                    self._memory[key] = doc["summary"]
+                return doc["summary"]
+        return None
+
+    def set(self, key, summary, period=""):
+        with self._lock:
+            self._memory[key] = summary
+        if self.collection is not None:
+            self.collection.replace_one(
+                {"_id": key},
+                {"summary": summary, "period": period, "created_at": datetime.now()},
+                upsert=True,
+            )
+
+
+def chunk_key(text, model):
+    """Chave estável de um trecho: conteúdo + modelo + versão do prompt de map."""
+    payload = f"{MAP_PROMPT_VERSION}\n{model}\n{text}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def group_entries(entries, max_chars=CHUNK_MAX_CHARS):
+    """
+    Agrupa as entradas por mês e, dentro do mês, em trechos de até max_chars.
+
+    Como o histórico só cresce no final, os trechos de meses anteriores ficam
+    idênticos entre execuções e seus resumos são reaproveitados do cache.
+
+    Returns:
+        list[tuple[str, str]]: Pares (período, texto) em ordem cronológica.
+    """
+    chunks = []
+    current_period, current = None, []
+    size = 0
+    for entry in entries:
+        period = entry["timestamp"].strftime("%m/%Y")
+        entry_size = len(entry["body"]) + 80
+        if current and (period != current_period or size + entry_size > max_chars):
+            chunks.append((current_period, format_entries(current)))
+            current, size = [], 0
+        current_period = period
+        current.append(entry)
+        size += entry_size
+    if current:
+        chunks.append((current_period, format_entries(current)))
+    return chunks
+
+
+def map_chunks(chunks, summarize, store, model, max_workers=MAP_CONCURRENCY):
+    """
+    Resume os trechos ainda não resumidos em paralelo (concorrência limitada).
+
+    Args:
+        chunks (list[tuple[str, str]]): Pares (período, texto).
+        summarize (Callable[[str, str], str]): Função que resume (período, texto).
+        store (ChunkSummaryStore): Armazenamento dos resumos parciais.
+        model (str): Modelo usado (faz parte da chave do cache).
+
+    Returns:
+        list[tuple[str, str]]: Pares (período, resumo) na mesma ordem dos trechos.
+    """
+    keys = [chunk_key(text, model) for _, text in chunks]
+    summaries = [store.get(key) for key in keys]
+    pending = [idx for idx, summary in enumerate(summaries) if summary is None]
+
+    def work(idx):
+        period, text = chunks[idx]
+        summary = summarize(period, text)
+        store.set(keys[idx], summary, period=period)
+        return summary
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for idx, summary in zip(pending, executor.map(work, pending)):
+                summaries[idx] = summary
+
+    return [(period, summary) for (period, _), summary in zip(chunks, summaries)]
+
+
+def _format_partials(partials):
+    return "\n\n".join(f"#### Período: {period}\n{summary}" for period, summary in partials)
+
+
+def reduce_partials(partials, summarize, store, model, max_chars=REDUCE_MAX_CHARS, max_workers=MAP_CONCURRENCY):
+    """
+    Reduz os resumos parciais em níveis até caberem em max_chars.
+
+    Cada nível agrupa resumos consecutivos e os resume de novo (também com cache).
+    """
+    while len(partials) > 1 and len(_format_partials(partials)) > max_chars:
+        groups, current, size = [], [], 0
+        for period, summary in partials:
+            block = len(summary) + 40
+            if current and size + block > max_chars // 2:
+                groups.append(current)
+                current, size = [], 0
+            current.append((period, summary))
+            size += block
+        if current:
+            groups.append(current)
+        if len(groups) == len(partials):
+            break # Cada resumo já ocupa um grupo inteiro; não há como reduzir mais
+
+        merged = [
+            (f"{group[0][0]} a {group[-1][0]}" if len(group) > 1 else group[0][0], _format_partials(group))
+            for group in groups
+        ]
+        partials = map_chunks(merged, summarize, store, model, max_workers=max_workers)
+    return partials
+
+
+def build_map_reduce_context(content, summarize, store, model, max_workers=MAP_CONCURRENCY):
+    """
+    Condensa o histórico inteiro em resumos por período, prontos para a etapa final.
+
+    Returns:
+        str: Resumos parciais (por período) em ordem cronológica.
+    """
+    entries = parse_legacy_archive(content)
+    partials = map_chunks(group_entries(entries), summarize, store, model, max_workers=max_workers)
+    partials = reduce_partials(partials, summarize, store, model, max_workers=max_workers)
+    return _format_partials(partials)
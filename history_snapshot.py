@@ -0,0 +1,62 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+from local_storage import data_path
+
+# Cópia local das entradas mais recentes, exibida quando o MongoDB está fora do ar
+# (arquivo dentro do diretório de dados locais, ver local_storage.py)
+SNAPSHOT_FILE = "history_snapshot.json"
+
+_lock = threading.Lock()
+
+
+def save_snapshot(entries, path=None):
+    """
+    Grava a cópia local das entradas (mais recentes primeiro, como em fetch_entries_page).
+
+    Falhas de disco são ignoradas: a cópia é só um apoio para o modo somente leitura.
+    """
+    data = {
+        "saved_at": datetime.now().isoformat(timespec="seconds"),
+        "entries": [
+            {
+                "_id": str(entry.get("_id", "")),
+                "timestamp": entry["timestamp"].isoformat(),
+                "user": entry.get("user", ""),
+                "title": entry.get("title", ""),
+                "body": entry["body"],
+            }
+            for entry in entries
+        ],
+    }
+    # Grava em arquivo temporário e renomeia, para nunca ler uma cópia pela metade
+    with _lock:
+        try:
+            path = path or data_path(SNAPSHOT_FILE)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as snapshot_file:
+                json.dump(data, snapshot_file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+
+def load_snapshot(path=None):
+    """
+    Lê a cópia local.
+
+    Returns:
+        tuple[list[dict], datetime | None]: Entradas (mais recentes primeiro) e quando a cópia foi gravada.
+    """
+    try:
+        with open(path or data_path(SNAPSHOT_FILE), encoding="utf-8") as snapshot_file:
+            data = json.load(snapshot_file)
+    except (OSError, ValueError):
+        return [], None
+    entries = []
+    for entry in data.get("entries", []):
+        entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+        entries.append(entry)
+    return entries, datetime.fromisoformat(data["saved_at"])
@@ -0,0 +1,31 @@
+import os
+
+# Diretório dos dados locais do app: fila de saves, cópia do histórico e cache de PDFs.
+# Ordem de precedência: variável de ambiente, [storage] data_dir no secrets.toml, ~/.aurelius.
+DATA_DIR_ENV = "AURELIUS_DATA_DIR"
+DEFAULT_DATA_DIR = os.path.join(os.path.expanduser("~"), ".aurelius")
+
+
+def _secrets_data_dir():
+    try:
+        import streamlit as st
+        return st.secrets["storage"]["data_dir"]
+    except Exception:
+        return None
+
+
+def data_dir():
+    """
+    Diretório dos dados locais, criado com acesso restrito ao usuário do processo.
+
+    Os arquivos guardam anotações em texto puro e saves ainda não enviados ao banco,
+    então o diretório deve ficar em disco persistente (não em /tmp, muitas vezes tmpfs).
+    """
+    path = os.environ.get(DATA_DIR_ENV) or _secrets_data_dir() or DEFAULT_DATA_DIR
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def data_path(name):
+    """Caminho de um arquivo (ou subdiretório) dentro do diretório de dados locais."""
+    return os.path.join(data_dir(), name)
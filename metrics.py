@@ -0,0 +1,174 @@
+import functools
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Limites superiores (segundos) das faixas do histograma de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+METRIC_PREFIX = "aurelius"
+
+# Contadores de volume e de cache registrados para cada operação
+COUNTERS = ("errors", "chars_in", "tokens_in", "tokens_out", "cache_hits", "cache_misses")
+
+
+class OperationStats:
+    """Histograma de latência e contadores de uma operação."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        for idx, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[idx] += 1
+                break
+
+    def percentile(self, fraction):
+        """Estimativa do percentil pelo limite superior da faixa do histograma."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= target:
+                return self.max_seconds if math.isinf(bound) else min(bound, self.max_seconds)
+        return self.max_seconds
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total_seconds, 6),
+            "avg_seconds": round(self.total_seconds / self.count, 6) if self.count else 0.0,
+            "p50_seconds": round(self.percentile(0.5), 6),
+            "p95_seconds": round(self.percentile(0.95), 6),
+            "max_seconds": round(self.max_seconds, 6),
+            "buckets": {("+Inf" if math.isinf(b) else str(b)): c for b, c in zip(LATENCY_BUCKETS, self.buckets)},
+            **self.counters,
+        }
+
+
+class Measurement:
+    """Medição em andamento (ver timed): permite registrar tamanhos e uso de cache."""
+
+    def __init__(self, registry, operation):
+        self.registry = registry
+        self.operation = operation
+
+    def payload(self, chars_in=0, tokens_in=0, tokens_out=0):
+        self.registry.add(self.operation, chars_in=chars_in, tokens_in=tokens_in, tokens_out=tokens_out)
+
+    def cache(self, hit):
+        self.registry.add(self.operation, **{"cache_hits" if hit else "cache_misses": 1})
+
+
+class MetricsRegistry:
+    """Métricas por operação, compartilhadas por todas as threads do processo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = {}
+
+    def _stats(self, operation):
+        stats = self._operations.get(operation)
+        if stats is None:
+            stats = self._operations[operation] = OperationStats()
+        return stats
+
+    def observe(self, operation, seconds, error=False):
+        with self._lock:
+            stats = self._stats(operation)
+            stats.observe(seconds)
+            if error:
+                stats.counters["errors"] += 1
+
+    def add(self, operation, **counters):
+        with self._lock:
+            stats = self._stats(operation)
+            for name, value in counters.items():
+                stats.counters[name] += value
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+
+    def snapshot(self):
+        """Métricas atuais de cada operação (dicionários simples, prontos para JSON)."""
+        with self._lock:
+            return {operation: stats.to_dict() for operation, stats in sorted(self._operations.items())}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        """Métricas no formato texto do Prometheus."""
+        snapshot = self.snapshot()
+        name = f"{METRIC_PREFIX}_operation_seconds"
+        lines = [f"# HELP {name} Latência das operações.", f"# TYPE {name} histogram"]
+        for operation, stats in snapshot.items():
+            label = f'operation="{operation}"'
+            cumulative = 0
+            for bound, count in stats["buckets"].items():
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{label}}} {stats['total_seconds']}")
+            lines.append(f"{name}_count{{{label}}} {stats['count']}")
+        for counter in COUNTERS:
+            counter_name = f"{METRIC_PREFIX}_operation_{counter}_total"
+            lines.append(f"# TYPE {counter_name} counter")
+            for operation, stats in snapshot.items():
+                lines.append(f'{counter_name}{{operation="{operation}"}} {stats[counter]}')
+        return "\n".join(lines) + "\n"
+
+
+# Registro único do processo
+REGISTRY = MetricsRegistry()
+
+
+@contextmanager
+def timed(operation, registry=None):
+    """
+    Mede a duração do bloco (e conta erro se ele lançar uma exceção).
+
+    Exemplo:
+        with timed("openai.chat") as m:
+            ...
+            m.payload(tokens_in=1200, tokens_out=300)
+    """
+    registry = registry or REGISTRY
+    start = time.perf_counter()
+    error = False
+    try:
+        yield Measurement(registry, operation)
+    except BaseException as e:
+        # Encerrar um gerador antes do fim (GeneratorExit) não é erro
+        error = not isinstance(e, GeneratorExit)
+        raise
+    finally:
+        registry.observe(operation, time.perf_counter() - start, error=error)
+
+
+def instrumented(operation):
+    """Decorador: mede cada chamada da função sob o nome da operação."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with timed(operation):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_cache(operation, hit):
+    """Registra um hit ou miss de cache da operação."""
+    Measurement(REGISTRY, operation).cache(hit)
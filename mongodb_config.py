@@ -1,5 +1,6 @@
-# Adicionar cache de conexão
-import os
+# Conexão com o MongoDB: cliente único por processo (st.cache_resource), pool e timeouts configuráveis
+import threading
+import time
 import streamlit as st
 from pymongo import MongoClient
 import urllib.parse
@@ -16,25 +17,93 @@ except KeyError as e:
 
 MONGODB_DATABASE = "AURELIUS"
 
-# Variável global para armazenar a conexão
-_mongo_client = None
+# Pool e timeouts (podem ser ajustados em [mongodb] no secrets.toml, ex.: max_pool_size = 50).
+# Com o cluster fora do ar, cada operação desiste em segundos em vez dos 30 s padrão do driver.
+DEFAULT_MAX_POOL_SIZE = 20
+DEFAULT_SERVER_SELECTION_TIMEOUT_MS = 3000
+DEFAULT_CONNECT_TIMEOUT_MS = 3000
+DEFAULT_SOCKET_TIMEOUT_MS = 20000
 
-# Função para obter conexão com o MongoDB Atlas
-def get_database():
-    global _mongo_client
-    
-    # Reutilizar conexão existente se disponível
-    if _mongo_client is not None:
-        return _mongo_client[MONGODB_DATABASE]
-        
+# Por quanto tempo o resultado do ping de prontidão é reaproveitado (segundos)
+HEALTHY_RECHECK_SECONDS = 15
+UNHEALTHY_RECHECK_SECONDS = 30
+
+def _setting(name, default):
+    """Valor inteiro opcional da seção [mongodb] dos secrets."""
+    try:
+        return int(st.secrets["mongodb"].get(name, default))
+    except Exception:
+        return default
+
+# Cliente único do processo: o pool de conexões é compartilhado por todas as sessões e reruns
+@st.cache_resource(show_spinner=False, on_release=lambda client: client.close())
+def get_mongo_client():
     username = urllib.parse.quote_plus(MONGODB_USERNAME)
     password = urllib.parse.quote_plus(MONGODB_PASSWORD)
     
     # String de conexão para MongoDB Atlas
     connection_string = f"mongodb+srv://{username}:{password}@{MONGODB_CLUSTER}/{MONGODB_DATABASE}?retryWrites=true&w=majority"
     
-    # Criar conexão com o MongoDB
-    _mongo_client = MongoClient(connection_string)
-    
-    # Retornar a base de dados
-    return _mongo_client[MONGODB_DATABASE]
\ No newline at end of file
+    # O MongoClient só conecta na primeira operação; os timeouts limitam a espera se o cluster cair
+    return MongoClient(
+        connection_string,
+        maxPoolSize=_setting("max_pool_size", DEFAULT_MAX_POOL_SIZE),
+        serverSelectionTimeoutMS=_setting("server_selection_timeout_ms", DEFAULT_SERVER_SELECTION_TIMEOUT_MS),
+        connectTimeoutMS=_setting("connect_timeout_ms", DEFAULT_CONNECT_TIMEOUT_MS),
+        socketTimeoutMS=_setting("socket_timeout_ms", DEFAULT_SOCKET_TIMEOUT_MS),
+        appname="aurelius",
+    )
+
+# Função para obter a base de dados
+def get_database():
+    return get_mongo_client()[MONGODB_DATABASE]
+
+class DatabaseHealth:
+    """
+    Resultado do ping de prontidão, reaproveitado por alguns segundos.
+
+    Evita pingar o cluster a cada rerun e, com o banco fora do ar, faz com que
+    apenas uma sessão espere o timeout enquanto as demais usam o último resultado
+    (o lock do ping nunca é aguardado quando já existe um resultado anterior).
+    """
+
+    def __init__(self, ping, healthy_recheck=HEALTHY_RECHECK_SECONDS, unhealthy_recheck=UNHEALTHY_RECHECK_SECONDS):
+        self._ping = ping
+        self.healthy_recheck = healthy_recheck
+        self.unhealthy_recheck = unhealthy_recheck
+        self.ready = None
+        self.error = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fresh(self):
+        interval = self.healthy_recheck if self.ready else self.unhealthy_recheck
+        return self.ready is not None and time.monotonic() - self.checked_at < interval
+
+    def check(self, force=False):
+        if not force and self._fresh():
+            return self.ready
+        # Com um ping já em andamento, as demais sessões usam o último resultado em vez de esperar
+        # (só a primeira verificação do processo, sem resultado anterior, aguarda o ping)
+        if not self._lock.acquire(blocking=self.ready is None):
+            return self.ready
+        try:
+            if not force and self._fresh():
+                return self.ready
+            try:
+                self._ping()
+                self.ready, self.error = True, None
+            except Exception as e:
+                self.ready, self.error = False, str(e)
+            self.checked_at = time.monotonic()
+            return self.ready
+        finally:
+            self._lock.release()
+
+@st.cache_resource(show_spinner=False)
+def get_database_health():
+    return DatabaseHealth(lambda: get_mongo_client().admin.command("ping"))
+
+def database_ready(force=False):
+    """Indica se o MongoDB responde ao ping (False: a página opera em modo somente leitura)."""
+    return get_database_health().check(force=force)
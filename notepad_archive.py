@@ -0,0 +1,247 @@
+import hashlib
+import re
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+
+from metrics import instrumented
+
+# Coleção legada (documento único com todo o histórico concatenado)
+LEGACY_COLLECTION = "repositorio"
+LEGACY_DOC_ID = "global_notepad_archive"
+
+# Nova coleção: um documento por entrada do histórico
+ENTRIES_COLLECTION = "repositorio_entradas"
+# Marca das entradas gravadas que ainda não entraram num resumo diário (ver digests.py)
+DIGEST_PENDING_FIELD = "digest_pending"
+
+TIMESTAMP_FORMAT = "%d/%m/%Y %H:%M"
+
+# Tempo após o qual uma migração iniciada e não concluída (ex.: processo encerrado) pode ser retomada
+MIGRATION_LEASE = timedelta(minutes=10)
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Tamanho padrão da página do histórico e campos trazidos do banco
+HISTORY_PAGE_SIZE = 20
+ENTRY_PROJECTION = {"timestamp": 1, "user": 1, "title": 1, "body": 1}
+
+# Cabeçalho legado: === 📅 dd/mm/aaaa HH:MM | 👤 usuário | Título: título ===
+_HEADER_RE = re.compile(
+    r"^=== 📅 (?P<timestamp>\d{2}/\d{2}/\d{4} \d{2}:\d{2})"
+    r"(?: \| 👤 (?P<user>.*?))?"
+    r"(?: \| Título: (?P<title>.*?))?"
+    r" ===[ \t]*$",
+    re.MULTILINE,
+)
+
+
+def get_entries_collection(db):
+    """Retorna a coleção de entradas do histórico, garantindo os índices necessários."""
+    collection = db[ENTRIES_COLLECTION]
+    collection.create_index([("timestamp", DESCENDING), ("_id", DESCENDING)])
+    collection.create_index([(DIGEST_PENDING_FIELD, ASCENDING)], sparse=True)
+    return collection
+
+
+def build_entry(body, user=None, title=None, timestamp=None):
+    """Monta o documento de uma entrada do histórico."""
+    return {
+        "timestamp": timestamp or datetime.now(),
+        "user": (user or "").strip(),
+        "title": (title or "").strip(),
+        "body": body,
+    }
+
+
+def format_header(entry):
+    """Formata o cabeçalho de uma entrada no padrão legado do histórico."""
+    timestamp = entry["timestamp"].strftime(TIMESTAMP_FORMAT)
+    user_str = f" | 👤 {entry['user']}" if entry.get("user") else ""
+    titulo_str = f" | Título: {entry['title']}" if entry.get("title") else ""
+    return f"=== 📅 {timestamp}{user_str}{titulo_str} ==="
+
+
+def format_entries(entries):
+    """Converte uma lista de entradas (ordem cronológica) no texto do histórico."""
+    return "\n\n".join(f"{format_header(e)}\n{e['body']}" for e in entries)
+
+
+def iter_all_entries(collection, batch_size=500):
+    """Percorre todas as entradas em ordem cronológica sem carregá-las de uma vez na memória."""
+    return collection.find(
+        {}, ENTRY_PROJECTION, sort=[("timestamp", ASCENDING), ("_id", ASCENDING)], batch_size=batch_size
+    )
+
+
+@instrumented("mongo.archive_fingerprint")
+def archive_fingerprint(collection):
+    """Identifica o estado atual do histórico (append-only) sem lê-lo: total de entradas + a mais recente."""
+    latest = collection.find_one({}, {"_id": 1}, sort=[("timestamp", DESCENDING), ("_id", DESCENDING)])
+    return f"{collection.estimated_document_count()}:{latest['_id'] if latest else ''}"
+
+
+@instrumented("mongo.fetch_entries_page")
+def fetch_entries_page(collection, before=None, limit=HISTORY_PAGE_SIZE):
+    """
+    Busca uma página de entradas, das mais recentes para as mais antigas.
+
+    Usa paginação por chave (timestamp, _id), de modo que o custo de cada página
+    não depende do tamanho total do histórico.
+
+    Args:
+        collection: Coleção de entradas.
+        before (dict, optional): Entrada mais antiga já carregada; a página começa logo antes dela.
+        limit (int): Quantidade máxima de entradas na página.
+
+    Returns:
+        tuple[list[dict], bool]: Entradas (mais recente primeiro) e se ainda há entradas mais antigas.
+    """
+    query = {}
+    if before is not None:
+        query = {"$or": [
+            {"timestamp": {"$lt": before["timestamp"]}},
+            {"timestamp": before["timestamp"], "_id": {"$lt": before["_id"]}},
+        ]}
+    cursor = collection.find(
+        query,
+        ENTRY_PROJECTION,
+        sort=[("timestamp", DESCENDING), ("_id", DESCENDING)],
+        limit=limit + 1,
+    )
+    entries = list(cursor)
+    return entries[:limit], len(entries) > limit
+
+
+@instrumented("mongo.fetch_newer_entries")
+def fetch_newer_entries(collection, after, limit=HISTORY_PAGE_SIZE):
+    """
+    Busca as entradas gravadas depois de uma entrada já carregada (paginação por chave).
+
+    Args:
+        collection: Coleção de entradas.
+        after (dict): Entrada mais recente já carregada.
+        limit (int): Quantidade máxima de entradas.
+
+    Returns:
+        tuple[list[dict], bool]: Entradas (mais recente primeiro) e se são todas as
+        entradas mais novas (False quando há mais de `limit`).
+    """
+    query = {"$or": [
+        {"timestamp": {"$gt": after["timestamp"]}},
+        {"timestamp": after["timestamp"], "_id": {"$gt": after["_id"]}},
+    ]}
+    cursor = collection.find(
+        query,
+        ENTRY_PROJECTION,
+        sort=[("timestamp", ASCENDING), ("_id", ASCENDING)],
+        limit=limit + 1,
+    )
+    entries = list(cursor)
+    return entries[:limit][::-1], len(entries) <= limit
+
+
+def parse_legacy_archive(content):
+    """
+    Separa o texto do histórico legado em entradas estruturadas.
+
+    Args:
+        content (str): Conteúdo concatenado do documento global_notepad_archive.
+
+    Returns:
+        list[dict]: Entradas com timestamp, user, title e body, na ordem original.
+    """
+    if not content:
+        return []
+
+    entries = []
+    matches = list(_HEADER_RE.finditer(content))
+
+    # Texto anterior ao primeiro cabeçalho (não deveria existir, mas não pode ser perdido)
+    leading = content[:matches[0].start()].strip() if matches else content.strip()
+    if leading:
+        first_ts = matches[0].group("timestamp") if matches else None
+        entries.append(build_entry(
+            leading,
+            timestamp=datetime.strptime(first_ts, TIMESTAMP_FORMAT) if first_ts else None,
+        ))
+
+    for idx, match in enumerate(matches):
+        end = matches[idx + 1].start() if idx + 1 < len(matches) else len(content)
+        body = content[match.end():end].strip("\n")
+        entries.append(build_entry(
+            body.rstrip(),
+            user=match.group("user"),
+            title=match.group("title"),
+            timestamp=datetime.strptime(match.group("timestamp"), TIMESTAMP_FORMAT),
+        ))
+    return entries
+
+
+def legacy_entry_id(idx, entry):
+    """
+    _id determinístico de uma entrada legada (posição no documento + cabeçalho).
+
+    Os 4 primeiros bytes são o timestamp da entrada, como num ObjectId comum, para
+    manter a ordem do índice (timestamp, _id); o restante vem do hash.
+    """
+    key = f"{idx}\n{format_header(entry)}"
+    digest = hashlib.sha256(key.encode("utf-8")).digest()[:8]
+    seconds = int(entry["timestamp"].timestamp()) & 0xFFFFFFFF
+    return ObjectId(seconds.to_bytes(4, "big") + digest)
+
+
+@instrumented("mongo.migrate_legacy_archive")
+def migrate_legacy_archive(db):
+    """
+    Migração única do documento legado para a coleção de entradas.
+
+    A migração só é concluída quando migrated_entries é gravado. Antes da cópia, o
+    documento legado é reivindicado (migrated_at) de forma atômica, para que execuções
+    concorrentes não copiem ao mesmo tempo; uma reivindicação mais antiga que
+    MIGRATION_LEASE (processo encerrado no meio) pode ser retomada. Cada entrada tem _id
+    determinístico: a nova tentativa ignora as entradas já inseridas (chave duplicada)
+    em vez de duplicá-las.
+
+    Returns:
+        int: Quantidade de entradas migradas (0 se não havia nada a migrar).
+    """
+    legacy = db[LEGACY_COLLECTION]
+    # Reivindica a migração de forma atômica para que dois processos não migrem em dobro
+    now = datetime.now()
+    doc = legacy.find_one_and_update(
+        {
+            "_id": LEGACY_DOC_ID,
+            "migrated_entries": {"$exists": False},
+            "$or": [{"migrated_at": {"$exists": False}}, {"migrated_at": {"$lt": now - MIGRATION_LEASE}}],
+        },
+        {"$set": {"migrated_at": now}},
+    )
+    if not doc:
+        return 0
+
+    entries = parse_legacy_archive(doc.get("content", ""))
+    for idx, entry in enumerate(entries):
+        entry["_id"] = legacy_entry_id(idx, entry)
+        entry["legacy"] = True
+    try:
+        if entries:
+            get_entries_collection(db).insert_many(entries, ordered=False)
+    except BulkWriteError as e:
+        if any(error.get("code") != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+            legacy.update_one({"_id": LEGACY_DOC_ID}, {"$unset": {"migrated_at": ""}})
+            raise
+    except Exception:
+        legacy.update_one({"_id": LEGACY_DOC_ID}, {"$unset": {"migrated_at": ""}})
+        raise
+
+    legacy.update_one({"_id": LEGACY_DOC_ID}, {"$set": {"migrated_entries": len(entries)}})
+    return len(entries)
+
+
+if __name__ == "__main__":
+    from mongodb_config import get_database
+
+    total = migrate_legacy_archive(get_database())
+    print(f"{total} entradas migradas para '{ENTRIES_COLLECTION}'.")
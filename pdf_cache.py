@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from local_storage import data_path
+from metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+# Alterar a versão do template invalida todos os PDFs já armazenados
+PDF_TEMPLATE_VERSION = "1"
+
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_BYTES = 512 * 1024 * 1024
+
+# Subdiretório do cache em disco dentro do diretório de dados locais (ver local_storage.py)
+CACHE_DIR_NAME = "pdf_cache"
+
+
+def pdf_cache_key(title, subtitle, body, template_version=PDF_TEMPLATE_VERSION):
+    """
+    Hash do conteúdo que define o PDF.
+
+    O corpo pode ser um texto ou um iterável de linhas (consumido ao calcular o hash).
+    """
+    digest = hashlib.sha256()
+    for part in (template_version, title, subtitle):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    lines = [body] if isinstance(body, str) else body
+    for line in lines:
+        digest.update(line.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class PdfCache:
+    """
+    Cache de PDFs endereçado por conteúdo, com um tier em memória e outro em disco.
+
+    Os dois tiers têm limite de tamanho (em bytes) e descartam os itens menos
+    usados recentemente (LRU). Sem cache_dir, o disco fica em CACHE_DIR_NAME no
+    diretório de dados locais; cache_dir="" usa só a memória.
+    """
+
+    def __init__(self, cache_dir=None, memory_bytes=DEFAULT_MEMORY_BYTES, disk_bytes=DEFAULT_DISK_BYTES):
+        self.cache_dir = data_path(CACHE_DIR_NAME) if cache_dir is None else cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def _remember(self, key, data):
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_used -= len(self._memory.pop(key))
+            self._memory[key] = data
+            self._memory_used += len(data)
+            while self._memory_used > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted)
+
+    def _evict_disk(self):
+        """Remove do disco os PDFs acessados há mais tempo até respeitar o limite."""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_atime, stat.st_size, path))
+        used = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if used <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+                used -= size
+            except OSError:
+                pass
+
+    def get(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                record_cache("pdf.cache", True)
+                return data
+
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as pdf_file:
+                    data = pdf_file.read()
+                os.utime(path) # Marca o acesso para a política LRU do disco
+            except OSError:
+                data = None
+            if data is not None:
+                self._remember(key, data)
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                record_cache("pdf.cache", True)
+                return data
+
+        with self._lock:
+            self.stats["misses"] += 1
+        record_cache("pdf.cache", False)
+        return None
+
+    def set(self, key, data):
+        self._remember(key, data)
+        if self.cache_dir:
+            # Grava em arquivo temporário e renomeia, para nunca servir um PDF pela metade
+            tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as pdf_file:
+                    pdf_file.write(data)
+                os.replace(tmp_path, self._path(key))
+            except OSError as e:
+                # Falha de disco não impede o download: o PDF segue no tier em memória
+                logger.warning("Não foi possível gravar o PDF %s no cache em disco: %s", key, e)
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return
+            self._evict_disk()
+
+    def get_or_build(self, key, build):
+        """Retorna o PDF do cache ou o gera com build() e o armazena."""
+        data = self.get(key)
+        if data is None:
+            data = build()
+            self.set(key, data)
+        return data
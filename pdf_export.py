@@ -0,0 +1,220 @@
+import re
+import tempfile
+from functools import lru_cache
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+from metrics import instrumented
+
+# Layout da página
+PAGE_WIDTH, PAGE_HEIGHT = A4
+X_MARGIN = 50
+TOP_MARGIN = 80
+BOTTOM_MARGIN = 60
+TEXT_WIDTH = PAGE_WIDTH - 2 * X_MARGIN
+
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+BODY_SIZE = 11
+LINE_HEIGHT = 14
+LIST_INDENT = 14
+
+# Títulos Markdown: nível -> (tamanho da fonte, espaço antes)
+HEADING_STYLES = {1: (15, 10), 2: (13, 8), 3: (11.5, 6)}
+
+# Acima deste tamanho o PDF em construção sai da memória para um arquivo temporário
+SPOOL_MAX_BYTES = 4 * 1024 * 1024
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+_BULLET_RE = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+_NUMBERED_RE = re.compile(r"^(\s*)(\d+[.)])\s+(.*)$")
+_RULE_RE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+_BOLD_RE = re.compile(r"(\*\*.+?\*\*)")
+
+
+@lru_cache(maxsize=16384)
+def text_width(text, font, size):
+    """Largura do texto na fonte (memorizada: as mesmas palavras se repetem muito)."""
+    return stringWidth(text, font, size)
+
+
+def _inline_words(text):
+    """Separa o texto em palavras com a marcação de negrito (**texto**) resolvida."""
+    words = []
+    for segment in _BOLD_RE.split(text):
+        if not segment:
+            continue
+        bold = segment.startswith("**") and segment.endswith("**") and len(segment) > 4
+        if bold:
+            segment = segment[2:-2]
+        words.extend((word, bold) for word in segment.split())
+    return words
+
+
+def wrap_words(words, width, size=BODY_SIZE, bold=False):
+    """
+    Quebra as palavras em linhas usando a largura real de cada uma na fonte.
+
+    Palavras mais largas que a linha são quebradas por caractere.
+
+    Returns:
+        list[list[tuple[str, bool]]]: Linhas, cada uma com suas palavras (texto, negrito).
+    """
+    lines, current, used = [], [], 0.0
+    for word, word_bold in words:
+        font = FONT_BOLD if (bold or word_bold) else FONT
+        word_width = text_width(word, font, size)
+        space = text_width(" ", font, size) if current else 0.0
+
+        while word_width > width:
+            # Palavra (ou URL) maior que a linha inteira: corta no limite
+            if current:
+                lines.append(current)
+                current, used, space = [], 0.0, 0.0
+            cut = len(word)
+            while cut > 1 and stringWidth(word[:cut], font, size) > width:
+                cut -= 1
+            lines.append([(word[:cut], word_bold)])
+            word = word[cut:]
+            word_width = text_width(word, font, size)
+
+        if current and used + space + word_width > width:
+            lines.append(current)
+            current, used, space = [], 0.0, 0.0
+        if word:
+            current.append((word, word_bold))
+            used += space + word_width
+    if current:
+        lines.append(current)
+    return lines
+
+
+class PdfWriter:
+    """
+    Gera o PDF página a página a partir de linhas de texto com Markdown simples
+    (títulos, listas, negrito e separadores).
+
+    O corpo pode ser consumido de forma incremental (qualquer iterável de linhas),
+    as páginas são comprimidas e o resultado é gravado em um arquivo temporário
+    que só vai para o disco quando passa de SPOOL_MAX_BYTES.
+    """
+
+    def __init__(self, output=None):
+        self.output = output if output is not None else tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        self.canvas = canvas.Canvas(self.output, pagesize=A4, pageCompression=1)
+        self.y = PAGE_HEIGHT - TOP_MARGIN
+        self.pages = 1
+
+    def _ensure_space(self, height):
+        if self.y - height < BOTTOM_MARGIN:
+            self.canvas.showPage()
+            self.pages += 1
+            self.y = PAGE_HEIGHT - TOP_MARGIN
+
+    def _draw_words(self, words, x, size, bold=False):
+        # Palavras consecutivas com a mesma fonte são desenhadas de uma só vez
+        runs = []
+        for word, word_bold in words:
+            font = FONT_BOLD if (bold or word_bold) else FONT
+            if runs and runs[-1][0] == font:
+                runs[-1][1].append(word)
+            else:
+                runs.append((font, [word]))
+        for font, run_words in runs:
+            text = " ".join(run_words)
+            self.canvas.setFont(font, size)
+            self.canvas.drawString(x, self.y, text)
+            x += text_width(text, font, size) + text_width(" ", font, size)
+
+    def _paragraph(self, words, indent=0, size=BODY_SIZE, bold=False, marker=None, line_height=LINE_HEIGHT):
+        for idx, line in enumerate(wrap_words(words, TEXT_WIDTH - indent, size=size, bold=bold)):
+            self._ensure_space(line_height)
+            if marker and idx == 0:
+                self.canvas.setFont(FONT, size)
+                self.canvas.drawRightString(X_MARGIN + indent - 4, self.y, marker)
+            self._draw_words(line, X_MARGIN + indent, size, bold=bold)
+            self.y -= line_height
+
+    def header(self, title, subtitle=""):
+        """Título (negrito, 16pt) e linhas de subtítulo (10pt), como no layout original."""
+        self._paragraph(_inline_words(title), size=16, bold=True, line_height=20)
+        self.y -= 8
+        for line in subtitle.split("\n"):
+            if line.strip():
+                self._paragraph(_inline_words(line), size=10)
+        self.y -= 10
+
+    def write_line(self, line):
+        """Desenha uma linha de Markdown."""
+        line = line.rstrip()
+        if not line.strip():
+            self.y -= LINE_HEIGHT // 2
+            return
+
+        if _RULE_RE.match(line):
+            self._ensure_space(LINE_HEIGHT)
+            self.canvas.setLineWidth(0.5)
+            self.canvas.line(X_MARGIN, self.y + 4, PAGE_WIDTH - X_MARGIN, self.y + 4)
+            self.y -= LINE_HEIGHT // 2 + 4
+            return
+
+        heading = _HEADING_RE.match(line)
+        if heading:
+            size, space_before = HEADING_STYLES.get(len(heading.group(1)), HEADING_STYLES[3])
+            self.y -= space_before
+            self._ensure_space(size + LINE_HEIGHT)
+            self._paragraph(_inline_words(heading.group(2)), size=size, bold=True, line_height=size + 4)
+            return
+
+        bullet = _BULLET_RE.match(line)
+        if bullet:
+            indent = LIST_INDENT * (1 + len(bullet.group(1).expandtabs(4)) // 2)
+            self._paragraph(_inline_words(bullet.group(2)), indent=indent, marker="•")
+            return
+
+        numbered = _NUMBERED_RE.match(line)
+        if numbered:
+            indent = LIST_INDENT * (1 + len(numbered.group(1).expandtabs(4)) // 2) + 6
+            self._paragraph(_inline_words(numbered.group(3)), indent=indent, marker=numbered.group(2))
+            return
+
+        self._paragraph(_inline_words(line))
+
+    def write(self, lines):
+        """Desenha um iterável de linhas (ou um texto inteiro)."""
+        if isinstance(lines, str):
+            lines = lines.split("\n")
+        for line in lines:
+            for part in line.split("\n"):
+                self.write_line(part)
+
+    def close(self):
+        """Finaliza o documento e devolve o arquivo de saída posicionado no início."""
+        self.canvas.save()
+        self.output.seek(0)
+        return self.output
+
+
+def render_pdf(title, subtitle, body, output=None):
+    """
+    Gera o PDF e devolve o arquivo (SpooledTemporaryFile por padrão).
+
+    Args:
+        title (str): Título do documento.
+        subtitle (str): Linhas de subtítulo (data, usuário etc.).
+        body (str | Iterable[str]): Conteúdo em Markdown simples, inteiro ou linha a linha.
+        output (file, optional): Arquivo binário de destino.
+    """
+    writer = PdfWriter(output)
+    writer.header(title, subtitle)
+    writer.write(body)
+    return writer.close()
+
+
+@instrumented("pdf.build")
+def build_pdf(title, subtitle, body):
+    """Gera o PDF e devolve seus bytes."""
+    with render_pdf(title, subtitle, body) as pdf_file:
+        return pdf_file.read()
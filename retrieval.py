@@ -0,0 +1,166 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+from notepad_archive import parse_legacy_archive, format_header
+from metrics import instrumented
+
+# Parâmetros padrão do BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Limites do contexto enviado à IA
+DEFAULT_TOP_K = 8
+DEFAULT_MAX_CHARS = 12000
+MAX_CHUNK_CHARS = 3000
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = frozenset("""
+a ao aos as ate com como da das de dela dele deles do dos e ela ele eles em entre era essa esse esta
+este eu foi for foram ha isso isto ja la lhe mais mas me mesmo meu minha muito na nas nao nem no nos
+nossa nosso num numa o os ou para pela pelas pelo pelos por qual quando que quem se sem ser seu seus
+so sua suas tambem te tem ter todo todos tu um uma umas uns voce voces sobre quais
+""".split())
+
+
+def normalize_text(text):
+    """Remove acentos e converte para minúsculas."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(text):
+    """Quebra o texto em termos normalizados, descartando stopwords e termos de um caractere."""
+    return [
+        token for token in _TOKEN_RE.findall(normalize_text(text))
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def chunk_archive(content, max_chunk_chars=MAX_CHUNK_CHARS):
+    """
+    Divide o histórico em trechos por entrada.
+
+    Entradas muito longas são quebradas em partes (por parágrafo), repetindo o cabeçalho
+    em cada parte para que o trecho continue identificável.
+
+    Returns:
+        list[str]: Trechos em ordem cronológica.
+    """
+    chunks = []
+    for entry in parse_legacy_archive(content):
+        header = format_header(entry)
+        body = entry["body"]
+        if len(body) <= max_chunk_chars:
+            chunks.append(f"{header}\n{body}")
+            continue
+
+        part = ""
+        for paragraph in body.split("\n\n"):
+            while len(paragraph) > max_chunk_chars:
+                if part:
+                    chunks.append(f"{header}\n{part}")
+                    part = ""
+                chunks.append(f"{header}\n{paragraph[:max_chunk_chars]}")
+                paragraph = paragraph[max_chunk_chars:]
+            if part and len(part) + len(paragraph) + 2 > max_chunk_chars:
+                chunks.append(f"{header}\n{part}")
+                part = ""
+            part = f"{part}\n\n{paragraph}" if part else paragraph
+        if part:
+            chunks.append(f"{header}\n{part}")
+    return chunks
+
+
+class BM25Index:
+    """Índice lexical BM25 em memória sobre uma lista de trechos."""
+
+    def __init__(self, chunks, k1=BM25_K1, b=BM25_B):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(tokenize(chunk)) for chunk in chunks]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+        doc_freq = Counter()
+        for tf in self.term_freqs:
+            doc_freq.update(tf.keys())
+        total = len(chunks)
+        self.idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+    def scores(self, query):
+        """Calcula a pontuação BM25 de cada trecho para a consulta."""
+        terms = [t for t in set(tokenize(query)) if t in self.idf]
+        result = [0.0] * len(self.chunks)
+        if not terms or not self.avg_length:
+            return result
+        for idx, tf in enumerate(self.term_freqs):
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[idx] / self.avg_length)
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            result[idx] = score
+        return result
+
+    def search(self, query, top_k=DEFAULT_TOP_K):
+        """Retorna os índices dos top_k trechos mais relevantes (apenas pontuação > 0)."""
+        scores = self.scores(query)
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        return [i for i in ranked[:top_k] if scores[i] > 0]
+
+
+@lru_cache(maxsize=4)
+def build_index(content):
+    """Constrói (e memoriza por conteúdo) o índice BM25 do histórico."""
+    return BM25Index(chunk_archive(content))
+
+
+@instrumented("retrieval.select_context")
+def select_context(content, query=None, top_k=DEFAULT_TOP_K, max_chars=DEFAULT_MAX_CHARS):
+    """
+    Seleciona os trechos do histórico relevantes para a consulta.
+
+    Sem consulta (ou sem nenhum termo em comum com o histórico), usa as entradas mais
+    recentes. O resultado é devolvido em ordem cronológica e nunca passa de max_chars.
+
+    Args:
+        content (str): Histórico completo de notas.
+        query (str, optional): Pergunta ou foco informado pelo usuário.
+        top_k (int): Quantidade máxima de trechos selecionados pela busca.
+        max_chars (int): Limite de caracteres do contexto final.
+
+    Returns:
+        str: Trechos selecionados, separados por linha em branco.
+    """
+    index = build_index(content or "")
+    if not index.chunks:
+        return ""
+
+    selected = index.search(query, top_k=top_k) if query and query.strip() else []
+    if not selected:
+        # Sem relevância lexical: prioriza o que é mais recente
+        selected = list(range(len(index.chunks) - 1, -1, -1))
+
+    chosen = []
+    used = 0
+    for idx in selected:
+        size = len(index.chunks[idx]) + 2
+        if used + size > max_chars:
+            if chosen:
+                continue
+            # Garante ao menos um trecho, mesmo que precise ser cortado
+            chosen.append(idx)
+            break
+        chosen.append(idx)
+        used += size
+
+    return "\n\n".join(index.chunks[i] for i in sorted(chosen))[:max_chars]
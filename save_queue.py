@@ -0,0 +1,215 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from local_storage import data_path
+from metrics import timed, instrumented
+from notepad_archive import DIGEST_PENDING_FIELD
+
+# Arquivo da fila dentro do diretório de dados locais (ver local_storage.py)
+QUEUE_FILE = "save_queue.sqlite3"
+
+# Entradas enviadas por insert_many
+FLUSH_BATCH_SIZE = 200
+# Espera máxima entre envios (um save novo acorda o envio na hora)
+FLUSH_INTERVAL = 1.0
+# Espera entre tentativas quando o MongoDB falha (dobra a cada falha, até o máximo)
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 60.0
+
+# Envios recusados pelo MongoDB (ex.: validação) antes de a entrada ir para a quarentena
+MAX_ENTRY_ATTEMPTS = 3
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _to_row(entry):
+    return str(entry["_id"]), json.dumps({
+        "timestamp": entry["timestamp"].isoformat(),
+        "user": entry.get("user", ""),
+        "title": entry.get("title", ""),
+        "body": entry["body"],
+    }, ensure_ascii=False)
+
+
+def _from_row(entry_id, payload):
+    entry = json.loads(payload)
+    entry["_id"] = ObjectId(entry_id)
+    entry["timestamp"] = datetime.fromisoformat(entry["timestamp"])
+    return entry
+
+
+class SaveQueue:
+    """
+    Fila local (SQLite) de saves do histórico, enviada ao MongoDB em segundo plano.
+
+    O save é confirmado assim que a entrada está gravada no disco local. Uma thread
+    envia as entradas pendentes em lotes (insert_many) e repete com backoff se o
+    MongoDB estiver lento ou fora do ar. O _id de cada entrada é gerado na fila e
+    serve de chave de idempotência: reenviar um lote já gravado não duplica nada.
+    Uma entrada recusada pelo servidor MAX_ENTRY_ATTEMPTS vezes vai para a tabela
+    de quarentena, para não travar as demais.
+
+    Args:
+        get_collection (Callable[[], Collection]): Coleção de entradas (chamada a cada envio).
+        on_flushed (Callable[[list[dict]], None], optional): Recebe as entradas recém-gravadas
+            (ex.: para atualizar o índice de busca).
+        path (str, optional): Arquivo SQLite da fila (padrão: QUEUE_FILE no diretório de dados locais).
+    """
+
+    def __init__(self, get_collection, on_flushed=None, path=None,
+                 batch_size=FLUSH_BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.get_collection = get_collection
+        self.on_flushed = on_flushed
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.last_error = None # Último erro de envio (exibido junto das entradas pendentes)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._db = sqlite3.connect(path or data_path(QUEUE_FILE), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pending (id TEXT PRIMARY KEY, payload TEXT NOT NULL, queued_at REAL NOT NULL)"
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(pending)")}
+        if "attempts" not in columns: # Fila criada por uma versão anterior
+            self._db.execute("ALTER TABLE pending ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS quarantine ("
+            "id TEXT PRIMARY KEY, payload TEXT NOT NULL, queued_at REAL NOT NULL, error TEXT, failed_at REAL NOT NULL)"
+        )
+        self._thread = threading.Thread(target=self._run, name="aurelius-save-queue", daemon=True)
+        self._thread.start()
+
+    @instrumented("queue.enqueue")
+    def enqueue(self, entry):
+        """
+        Grava a entrada na fila local e devolve-a com o _id definitivo.
+
+        Args:
+            entry (dict): Entrada montada com notepad_archive.build_entry.
+
+        Returns:
+            dict: A mesma entrada, com _id.
+        """
+        entry.setdefault("_id", ObjectId())
+        entry_id, payload = _to_row(entry)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO pending (id, payload, queued_at) VALUES (?, ?, ?)", (entry_id, payload, time.time())
+            )
+        self._wake.set()
+        return entry
+
+    def pending_entries(self):
+        """Entradas ainda não enviadas ao MongoDB (mais recentes primeiro)."""
+        with self._lock:
+            rows = self._db.execute("SELECT id, payload FROM pending ORDER BY queued_at DESC").fetchall()
+        return [_from_row(entry_id, payload) for entry_id, payload in rows]
+
+    def pending_count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def quarantined_count(self):
+        """Entradas recusadas pelo MongoDB, guardadas na fila local para recuperação manual."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM quarantine").fetchone()[0]
+
+    def _record_failures(self, rows, failures):
+        """Conta a falha de cada entrada recusada; as que esgotaram as tentativas vão para a quarentena."""
+        now = time.time()
+        with self._lock:
+            for entry_id, error in failures.items():
+                self._db.execute("UPDATE pending SET attempts = attempts + 1 WHERE id = ?", (entry_id,))
+                self._db.execute(
+                    "INSERT OR REPLACE INTO quarantine SELECT id, payload, queued_at, ?, ? FROM pending "
+                    "WHERE id = ? AND attempts >= ?",
+                    (error, now, entry_id, MAX_ENTRY_ATTEMPTS),
+                )
+                self._db.execute("DELETE FROM pending WHERE id = ? AND attempts >= ?", (entry_id, MAX_ENTRY_ATTEMPTS))
+
+    def flush(self):
+        """
+        Envia um lote de entradas pendentes.
+
+        Entradas recusadas individualmente pelo servidor ficam na fila (ou vão para a
+        quarentena, ver MAX_ENTRY_ATTEMPTS) sem impedir que o restante do lote seja gravado.
+
+        Returns:
+            int: Quantidade de entradas processadas do lote.
+
+        Raises:
+            Exception: Falha no envio (as entradas continuam na fila).
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, payload FROM pending ORDER BY queued_at LIMIT ?", (self.batch_size,)
+            ).fetchall()
+        if not rows:
+            return 0
+
+        processed = len(rows)
+        entries = [_from_row(entry_id, payload) for entry_id, payload in rows]
+        for entry in entries:
+            # O timestamp é o do save: o dia pode já ter sido resumido quando a entrada chegar
+            entry[DIGEST_PENDING_FIELD] = True
+        with timed("mongo.flush_queue") as measurement:
+            measurement.payload(chars_in=sum(len(entry["body"]) for entry in entries))
+            try:
+                self.get_collection().insert_many(entries, ordered=False)
+                inserted = entries
+                self.last_error = None
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if not errors:
+                    raise # Só falhou a confirmação (write concern): o lote é reenviado
+                # Chave duplicada: a entrada já tinha sido gravada num envio anterior
+                skipped = {error["index"] for error in errors}
+                inserted = [entry for idx, entry in enumerate(entries) if idx not in skipped]
+                failures = {
+                    rows[error["index"]][0]: error.get("errmsg", str(error.get("code")))
+                    for error in errors if error.get("code") != DUPLICATE_KEY_ERROR
+                }
+                if failures:
+                    self.last_error = next(iter(failures.values()))
+                    self._record_failures(rows, failures)
+                    rows = [row for row in rows if row[0] not in failures]
+
+        with self._lock:
+            self._db.executemany("DELETE FROM pending WHERE id = ?", [(entry_id,) for entry_id, _ in rows])
+        if self.on_flushed and inserted:
+            try:
+                self.on_flushed(inserted)
+            except Exception:
+                pass # A entrada já está salva; o índice pode ser reconstruído depois
+        return processed
+
+    def _run(self):
+        delay = RETRY_BASE_DELAY
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                while self.flush() >= self.batch_size:
+                    pass # Fila longa: envia os lotes seguidos
+                delay = RETRY_BASE_DELAY
+                self._wake.wait(self.flush_interval)
+            except Exception as e:
+                self.last_error = str(e)
+                self._stop.wait(delay)
+                delay = min(delay * 2, RETRY_MAX_DELAY)
+
+    def close(self):
+        """Interrompe a thread de envio (as entradas pendentes ficam no disco para a próxima execução)."""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        with self._lock:
+            self._db.close()
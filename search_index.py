@@ -0,0 +1,258 @@
+import math
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from notepad_archive import ENTRIES_COLLECTION, ENTRY_PROJECTION
+from archive_search import search_archive
+from retrieval import tokenize, BM25_K1, BM25_B, DEFAULT_TOP_K
+from metrics import instrumented
+
+# Frequência de documentos de cada termo: {_id: termo, df}
+INDEX_COLLECTION = "repositorio_indice"
+# Índice invertido: um documento por (termo, entrada) -> {t, e, tf, len}.
+# Termos comuns viram muitos documentos pequenos em vez de um array que cresceria até o limite de 16 MB.
+POSTINGS_COLLECTION = "repositorio_indice_postings"
+# Estatísticas globais do índice (quantidade de entradas e soma dos tamanhos)
+META_COLLECTION = "repositorio_indice_meta"
+STATS_ID = "stats"
+# Versão do formato do índice; um índice de outra versão é reconstruído
+INDEX_LAYOUT = 2
+# Reserva da reconstrução (um processo por vez); expira se o processo for encerrado no meio
+REBUILD_LOCK_ID = "rebuild"
+REBUILD_LEASE = timedelta(minutes=30)
+
+# Postings lidos por termo na busca (os de maior tf); limita o custo dos termos muito comuns
+MAX_POSTINGS_PER_TERM = 5000
+# Postings gravados por insert_many na reconstrução
+REBUILD_BATCH_SIZE = 5000
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _posting_id(term, entry_id):
+    return f"{term} {entry_id}"
+
+
+def _entry_terms(entry):
+    """Frequência dos termos de uma entrada (título, usuário e corpo)."""
+    text = f"{entry.get('title', '')} {entry.get('user', '')} {entry.get('body', '')}"
+    return Counter(tokenize(text))
+
+
+@instrumented("mongo.index_entry")
+def index_entry(db, entry):
+    """
+    Atualiza o índice de forma incremental com uma nova entrada.
+
+    Cada posting tem _id derivado de (termo, entrada) e é gravado com upsert, então
+    indexar a mesma entrada de novo (ex.: repetição de um envio) não conta nada em
+    dobro: df e as estatísticas só avançam para os postings realmente criados.
+
+    Args:
+        db: Base de dados do MongoDB.
+        entry (dict): Entrada já salva (precisa ter _id).
+    """
+    term_freqs = _entry_terms(entry)
+    if not term_freqs:
+        return
+    length = sum(term_freqs.values())
+    try:
+        result = db[POSTINGS_COLLECTION].bulk_write([
+            UpdateOne(
+                {"_id": _posting_id(term, entry["_id"])},
+                {"$setOnInsert": {"t": term, "e": entry["_id"], "tf": tf, "len": length}},
+                upsert=True,
+            )
+            for term, tf in term_freqs.items()
+        ], ordered=False)
+        upserted = result.upserted_ids.values()
+    except BulkWriteError as e:
+        # Chave duplicada: outro save indexou o mesmo posting ao mesmo tempo
+        if any(error.get("code") != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+            raise
+        upserted = [item["_id"] for item in e.details.get("upserted", [])]
+
+    new_terms = [posting_id.rsplit(" ", 1)[0] for posting_id in upserted]
+    if not new_terms:
+        return
+    db[INDEX_COLLECTION].bulk_write(
+        [UpdateOne({"_id": term}, {"$inc": {"df": 1}}, upsert=True) for term in new_terms],
+        ordered=False,
+    )
+    # As estatísticas contam a entrada uma única vez: quando o posting do primeiro termo é criado
+    if min(term_freqs) in new_terms:
+        db[META_COLLECTION].update_one(
+            {"_id": STATS_ID},
+            {"$inc": {"docs": 1, "total_length": length}},
+            upsert=True,
+        )
+
+
+def _insert_postings(postings, batch):
+    try:
+        postings.insert_many(batch, ordered=False)
+    except BulkWriteError as e:
+        # Chave duplicada: um save indexou a entrada durante a reconstrução
+        if any(error.get("code") != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+            raise
+
+
+def rebuild_index(db):
+    """
+    Reconstrói o índice inteiro a partir da coleção de entradas (executar sob demanda).
+
+    Enquanto a reconstrução não termina, o índice não é considerado pronto (ver
+    index_ready) e a busca usa o índice de texto do MongoDB.
+
+    Returns:
+        int: Quantidade de entradas indexadas.
+    """
+    postings = db[POSTINGS_COLLECTION]
+    db[META_COLLECTION].replace_one({"_id": STATS_ID}, {"docs": 0, "total_length": 0}, upsert=True)
+    postings.delete_many({})
+    db[INDEX_COLLECTION].delete_many({})
+
+    document_freqs = Counter()
+    batch = []
+    docs = 0
+    total_length = 0
+    for entry in db[ENTRIES_COLLECTION].find({}, ENTRY_PROJECTION):
+        term_freqs = _entry_terms(entry)
+        length = sum(term_freqs.values())
+        for term, tf in term_freqs.items():
+            batch.append({"_id": _posting_id(term, entry["_id"]), "t": term, "e": entry["_id"], "tf": tf, "len": length})
+        document_freqs.update(term_freqs.keys())
+        docs += 1
+        total_length += length
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            _insert_postings(postings, batch)
+            batch = []
+    if batch:
+        _insert_postings(postings, batch)
+
+    if document_freqs:
+        db[INDEX_COLLECTION].bulk_write(
+            [UpdateOne({"_id": term}, {"$set": {"df": df}}, upsert=True) for term, df in document_freqs.items()],
+            ordered=False,
+        )
+    db[META_COLLECTION].replace_one(
+        {"_id": STATS_ID},
+        {"docs": docs, "total_length": total_length, "layout": INDEX_LAYOUT},
+        upsert=True,
+    )
+    return docs
+
+
+def index_ready(db):
+    """Indica se o índice foi construído no formato atual (saves novos o mantêm atualizado)."""
+    stats = db[META_COLLECTION].find_one({"_id": STATS_ID}, {"layout": 1})
+    return stats is not None and stats.get("layout") == INDEX_LAYOUT
+
+
+def _claim_rebuild(db):
+    """Reserva a reconstrução para este processo; False se outro já a está executando."""
+    now = datetime.now()
+    try:
+        # Sem reserva, o upsert a cria; com uma reserva vencida, assume-a
+        db[META_COLLECTION].find_one_and_update(
+            {"_id": REBUILD_LOCK_ID, "started_at": {"$lt": now - REBUILD_LEASE}},
+            {"$set": {"started_at": now}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return False # Reserva ativa de outro processo
+    return True
+
+
+def rebuild_index_in_background(db):
+    """
+    Reconstrói o índice numa thread, se nenhum outro processo já estiver reconstruindo.
+
+    Returns:
+        threading.Thread | None: A thread iniciada, ou None se a reconstrução já estava reservada.
+    """
+    if not _claim_rebuild(db):
+        return None
+
+    def run():
+        try:
+            rebuild_index(db)
+        finally:
+            db[META_COLLECTION].delete_one({"_id": REBUILD_LOCK_ID})
+
+    thread = threading.Thread(target=run, name="aurelius-search-index", daemon=True)
+    thread.start()
+    return thread
+
+
+def ensure_search_index(db):
+    """
+    Garante os índices do MongoDB e, se o índice invertido ainda não existir ou estiver
+    num formato antigo (ex.: logo após a migração), dispara a reconstrução em segundo plano.
+    """
+    db[POSTINGS_COLLECTION].create_index([("t", ASCENDING), ("tf", DESCENDING)])
+    if not index_ready(db):
+        rebuild_index_in_background(db)
+
+
+def search_index(db, query, top_k=DEFAULT_TOP_K):
+    """
+    Busca por palavras-chave usando BM25 sobre o índice persistente.
+
+    Apenas os postings dos termos da consulta são lidos (no máximo MAX_POSTINGS_PER_TERM
+    por termo, os de maior frequência); o histórico não é reprocessado.
+
+    Returns:
+        list[tuple]: Pares (id da entrada, pontuação), do mais para o menos relevante.
+    """
+    terms = list(set(tokenize(query)))
+    stats = db[META_COLLECTION].find_one({"_id": STATS_ID})
+    if not terms or not stats or not stats.get("docs"):
+        return []
+
+    total = stats["docs"]
+    avg_length = (stats.get("total_length") or 0) / total or 1.0
+    scores = defaultdict(float)
+    for term_doc in db[INDEX_COLLECTION].find({"_id": {"$in": terms}}):
+        df = term_doc["df"]
+        idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+        term_postings = (
+            db[POSTINGS_COLLECTION]
+            .find({"t": term_doc["_id"]}, {"_id": 0, "e": 1, "tf": 1, "len": 1})
+            .sort("tf", DESCENDING)
+            .limit(MAX_POSTINGS_PER_TERM)
+        )
+        for posting in term_postings:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * posting["len"] / avg_length)
+            scores[posting["e"]] += idf * posting["tf"] * (BM25_K1 + 1) / (posting["tf"] + norm)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+
+@instrumented("mongo.search_entries")
+def search_entries(db, query, top_k=DEFAULT_TOP_K):
+    """
+    Retorna as entradas mais relevantes para a consulta, em ordem de relevância.
+
+    Enquanto o índice invertido não está pronto, usa a busca textual do MongoDB (ou regex).
+    """
+    if not index_ready(db):
+        results, _ = search_archive(db[ENTRIES_COLLECTION], query, page_size=top_k)
+        return [{key: entry[key] for key in ("_id", *ENTRY_PROJECTION)} for entry in results]
+    hits = search_index(db, query, top_k=top_k)
+    if not hits:
+        return []
+    by_id = {
+        entry["_id"]: entry
+        for entry in db[ENTRIES_COLLECTION].find({"_id": {"$in": [entry_id for entry_id, _ in hits]}}, ENTRY_PROJECTION)
+    }
+    return [by_id[entry_id] for entry_id, _ in hits if entry_id in by_id]
+
+
+if __name__ == "__main__":
+    from mongodb_config import get_database
+
+    total = rebuild_index(get_database())
+    print(f"Índice reconstruído com {total} entradas.")
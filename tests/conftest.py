@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+# mongod local para os testes (padrão: mongomock em memória)
+MONGO_URI_ENV = "AURELIUS_TEST_MONGO_URI"
+TEST_DATABASE = "AURELIUS_TEST"
+
+
+@pytest.fixture
+def db():
+    """Base vazia: mongod local se AURELIUS_TEST_MONGO_URI estiver definida, senão mongomock."""
+    uri = os.environ.get(MONGO_URI_ENV)
+    if uri:
+        from pymongo import MongoClient
+
+        client = MongoClient(uri, serverSelectionTimeoutMS=2000)
+        client.drop_database(TEST_DATABASE)
+        yield client[TEST_DATABASE]
+        client.drop_database(TEST_DATABASE)
+        client.close()
+    else:
+        mongomock = pytest.importorskip("mongomock")
+        yield mongomock.MongoClient()[TEST_DATABASE]
@@ -0,0 +1,129 @@
+"""
+Testes da busca no histórico (archive_search).
+
+Uso (na raiz do repositório):
+    pip install -r tests/requirements.txt
+    python -m pytest tests
+    AURELIUS_TEST_MONGO_URI=mongodb://localhost:27017 python -m pytest tests
+"""
+from datetime import date, datetime
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from archive_search import ensure_text_index, highlight_snippet, query_terms, search_archive
+from notepad_archive import build_entry, get_entries_collection
+
+
+@pytest.fixture
+def collection(db):
+    collection = get_entries_collection(db)
+    ensure_text_index(collection)
+    return collection
+
+
+def add(collection, body, user="", title="", timestamp=None):
+    entry = build_entry(body, user=user, title=title, timestamp=timestamp or datetime(2026, 3, 10, 9, 0))
+    collection.insert_one(entry)
+    return entry
+
+
+class TextSearchUnavailable:
+    """Coleção que rejeita $text, como um servidor sem índice de texto."""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def find(self, query, *args, **kwargs):
+        if "$text" in query:
+            raise OperationFailure("text index required for $text query")
+        return self._collection.find(query, *args, **kwargs)
+
+
+def test_ranks_entries_with_more_matches_first(collection):
+    add(collection, "O tema foi citado de passagem: orçamento.", title="Reunião geral")
+    add(collection, "Orçamento aprovado. O orçamento da unidade sobe 5%.", title="Orçamento 2026")
+    add(collection, "Nada relacionado ao assunto.", title="Outros")
+
+    results, has_more = search_archive(collection, "orçamento")
+
+    assert [entry["title"] for entry in results] == ["Orçamento 2026", "Reunião geral"]
+    assert not has_more
+
+
+def test_filters_by_user_title_and_period(collection):
+    add(collection, "Orçamento da unidade x", user="Ana", title="Alinhamento Mensal", timestamp=datetime(2026, 1, 5, 10))
+    add(collection, "Orçamento da unidade y", user="Bruno", title="Alinhamento Mensal", timestamp=datetime(2026, 2, 5, 10))
+    add(collection, "Orçamento da unidade z", user="Ana", title="Comitê", timestamp=datetime(2026, 2, 20, 23, 59))
+
+    by_user, _ = search_archive(collection, "orçamento", user="Ana")
+    assert {entry["body"] for entry in by_user} == {"Orçamento da unidade x", "Orçamento da unidade z"}
+
+    by_title, _ = search_archive(collection, "orçamento", title="alinhamento")
+    assert {entry["body"] for entry in by_title} == {"Orçamento da unidade x", "Orçamento da unidade y"}
+
+    # Período inclusivo nas duas pontas (a entrada das 23:59 do último dia entra)
+    by_period, _ = search_archive(collection, "orçamento", date_from=date(2026, 2, 5), date_to=date(2026, 2, 20))
+    assert {entry["body"] for entry in by_period} == {"Orçamento da unidade y", "Orçamento da unidade z"}
+
+    combined, _ = search_archive(collection, "orçamento", user="Ana", date_from=date(2026, 2, 1))
+    assert [entry["body"] for entry in combined] == ["Orçamento da unidade z"]
+
+
+def test_paginates_without_overlap(collection):
+    for idx in range(25):
+        add(collection, f"Revisão do contrato número {idx}", timestamp=datetime(2026, 3, 1 + idx, 9))
+
+    pages = [search_archive(collection, "contrato", page=page, page_size=10) for page in range(3)]
+
+    assert [len(results) for results, _ in pages] == [10, 10, 5]
+    assert [has_more for _, has_more in pages] == [True, True, False]
+    ids = [entry["_id"] for results, _ in pages for entry in results]
+    assert len(set(ids)) == 25
+
+
+def test_results_carry_highlighted_snippet(collection):
+    add(collection, "Nas reuniões de março decidimos revisar o orçamento.")
+
+    results, _ = search_archive(collection, "reunião")
+
+    assert "**reuniões**" in results[0]["snippet"]
+
+
+def test_query_without_terms_returns_nothing(collection):
+    add(collection, "Qualquer texto")
+
+    assert query_terms("de a o") == []
+    assert search_archive(collection, "de a o") == ([], False)
+
+
+def test_regex_fallback_without_text_index(collection):
+    add(collection, "Planejamento do orçamento anual", user="Ana", timestamp=datetime(2026, 1, 5))
+    add(collection, "Orçamento, orçamento e mais orçamento", user="Bruno", timestamp=datetime(2026, 1, 6))
+    add(collection, "Sem relação", user="Ana")
+
+    results, has_more = search_archive(TextSearchUnavailable(collection), "orçamento")
+
+    assert [entry["user"] for entry in results] == ["Bruno", "Ana"]
+    assert not has_more
+    assert all(entry["score"] > 0 for entry in results)
+
+    filtered, _ = search_archive(TextSearchUnavailable(collection), "orçamento", user="Ana")
+    assert [entry["user"] for entry in filtered] == ["Ana"]
+
+
+def test_highlight_snippet_marks_terms_and_trims():
+    text = "Introdução longa. " * 30 + "Aqui aparece o orçamento da unidade." + " Conclusão." * 30
+
+    snippet = highlight_snippet(text, query_terms("orçamento"), max_chars=120)
+
+    assert "**orçamento**" in snippet
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert len(snippet) <= 120 + len("****") + 2
+
+
+def test_highlight_snippet_without_match_returns_text_start():
+    text = "x" * 300
+
+    assert highlight_snippet(text, ["orcamento"], max_chars=50) == "x" * 50 + "…"
+    assert highlight_snippet("curto", ["orcamento"]) == "curto"
@@ -0,0 +1,38 @@
+"""
+Testes do corte das seções do prompt (token_budget).
+
+Uso (na raiz do repositório):
+    pip install -r tests/requirements.txt
+    python -m pytest tests
+"""
+from ai_summary import _history_section
+from token_budget import count_tokens, fit_sections
+
+
+def entry(day, words):
+    return f"=== 📅 {day:02d}/03/2026 09:00 | 👤 Ana | Título: Reunião {day} ===\n" + " ".join(words)
+
+
+def test_oversized_single_entry_keeps_its_header():
+    text = entry(10, [f"palavra{i}" for i in range(400)])
+    texts, counts = fit_sections([_history_section(text, 60, priority=1)])
+
+    assert texts["history"].startswith("=== 📅 10/03/2026 09:00")
+    assert 0 < counts["history"] <= 60
+
+
+def test_history_keeps_most_recent_whole_entries():
+    entries = [entry(day, ["texto"] * 30) for day in range(1, 6)]
+    text = "\n\n".join(entries)
+    budget = count_tokens("\n\n".join(entries[-2:])) + 1
+    texts, _ = fit_sections([_history_section(text, budget, priority=1)])
+
+    assert texts["history"] == "\n\n".join(entries[-2:])
+
+
+def test_oversized_newest_entry_is_cut_at_its_end():
+    entries = [entry(1, ["antigo"] * 5), entry(2, [f"palavra{i}" for i in range(400)])]
+    texts, _ = fit_sections([_history_section("\n\n".join(entries), 60, priority=1)])
+
+    assert texts["history"].startswith("=== 📅 02/03/2026 09:00")
+    assert "antigo" not in texts["history"]
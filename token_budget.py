@@ -0,0 +1,178 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Vocabulário do gpt-4o / gpt-4o-mini
+DEFAULT_ENCODING = "o200k_base"
+
+# Janela de contexto por modelo (entrada + saída)
+CONTEXT_WINDOWS = {"gpt-4o-mini": 128000, "gpt-4o": 128000}
+DEFAULT_CONTEXT_WINDOW = 16000
+
+# Tokens reservados ao texto fixo dos templates (instruções e formato da resposta) ao dividir a janela
+TEMPLATE_RESERVE_TOKENS = 1500
+
+# Pré-corte em caracteres antes da contagem exata (nenhum token tem mais que isso, na prática)
+CHARS_PER_TOKEN_CEILING = 6
+
+# Sem tiktoken: cada pedaço de até 4 letras ou cada sinal conta como um token (estimativa por excesso)
+_APPROX_TOKEN_RE = re.compile(r"\w{1,4}|[^\w\s]", re.UNICODE)
+
+
+@lru_cache(maxsize=4)
+def get_encoding(name=DEFAULT_ENCODING):
+    """Tokenizador local (tiktoken), ou None se não estiver disponível."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None # Sem tiktoken (ou sem o arquivo do vocabulário): usa a estimativa
+
+
+def count_tokens(text):
+    """Quantidade de tokens do texto."""
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return sum(1 for _ in _APPROX_TOKEN_RE.finditer(text))
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text, max_tokens, keep="start"):
+    """
+    Corta o texto para no máximo max_tokens tokens.
+
+    Args:
+        text (str): Texto original.
+        max_tokens (int): Limite de tokens.
+        keep (str): "start" mantém o início do texto; "end" mantém o final.
+
+    Returns:
+        str: Texto cortado (ou o original, se já couber).
+    """
+    if max_tokens <= 0 or not text:
+        return ""
+    encoding = get_encoding()
+    if encoding is None:
+        matches = list(_APPROX_TOKEN_RE.finditer(text))
+        if len(matches) <= max_tokens:
+            return text
+        if keep == "end":
+            return text[matches[-max_tokens].start():]
+        return text[:matches[max_tokens - 1].end()]
+
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    kept = tokens[-max_tokens:] if keep == "end" else tokens[:max_tokens]
+    return encoding.decode(kept)
+
+
+@dataclass
+class Section:
+    """
+    Trecho variável de um prompt, com seu orçamento de tokens.
+
+    Attributes:
+        name (str): Nome da seção no relatório (ex.: "history", "cargos").
+        text (str): Conteúdo da seção.
+        max_tokens (int): Orçamento próprio da seção.
+        priority (int): Ordem de corte quando o total estoura (maior = cortada primeiro).
+        separator (str): Separador entre as unidades (entradas, linhas). Vazio corta o texto corrido.
+        unit_start (str): Regex que marca o início de uma unidade (ex.: cabeçalho da entrada).
+        keep (str): "start" preserva as primeiras unidades; "end" as últimas (mais recentes).
+    """
+    name: str
+    text: str
+    max_tokens: int
+    priority: int = 1
+    separator: str = ""
+    unit_start: str = ""
+    keep: str = "start"
+
+
+def _split_units(section):
+    if not section.separator:
+        return [section.text]
+    pattern = re.escape(section.separator)
+    if section.unit_start:
+        pattern += f"(?={section.unit_start})"
+    return re.split(pattern, section.text)
+
+
+def trim_section(section, max_tokens):
+    """
+    Reduz a seção a max_tokens, descartando unidades inteiras.
+
+    As unidades são mantidas a partir do início ou do fim (conforme section.keep)
+    enquanto couberem; só a primeira unidade mantida pode ser cortada no meio,
+    quando nem ela cabe sozinha, e sempre pelo final, para preservar o cabeçalho.
+
+    Returns:
+        str: Texto da seção dentro do orçamento.
+    """
+    text = section.text or ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    units = _split_units(section)
+    if len(units) == 1 and not section.separator:
+        return truncate_tokens(text, max_tokens, keep=section.keep)
+
+    ordered = list(reversed(units)) if section.keep == "end" else units
+    separator_tokens = count_tokens(section.separator)
+    kept, used = [], 0
+    for unit in ordered:
+        size = count_tokens(unit) + (separator_tokens if kept else 0)
+        if used + size > max_tokens:
+            break
+        kept.append(unit)
+        used += size
+    if not kept:
+        kept = [truncate_tokens(ordered[0], max_tokens, keep="start")]
+    if section.keep == "end":
+        kept.reverse()
+    return section.separator.join(kept)
+
+
+def fit_sections(sections, total_tokens=None):
+    """
+    Aplica o orçamento de cada seção e, se a soma passar de total_tokens, corta as
+    seções de menor prioridade primeiro.
+
+    Args:
+        sections (list[Section]): Seções variáveis do prompt.
+        total_tokens (int, optional): Limite conjunto das seções.
+
+    Returns:
+        tuple[dict[str, str], dict[str, int]]: Texto final e tokens de cada seção.
+    """
+    texts, counts = {}, {}
+    for section in sections:
+        texts[section.name] = trim_section(section, section.max_tokens)
+        counts[section.name] = count_tokens(texts[section.name])
+
+    if total_tokens is not None:
+        for section in sorted(sections, key=lambda s: -s.priority):
+            excess = sum(counts.values()) - total_tokens
+            if excess <= 0:
+                break
+            reduced = Section(**{**section.__dict__, "text": texts[section.name]})
+            texts[section.name] = trim_section(reduced, max(0, counts[section.name] - excess))
+            counts[section.name] = count_tokens(texts[section.name])
+    return texts, counts
+
+
+def context_window(model):
+    """Janela de contexto do modelo (entrada + saída)."""
+    return CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+
+def input_budget(model, max_output_tokens, reserve=TEMPLATE_RESERVE_TOKENS):
+    """Tokens que as seções variáveis podem ocupar sem que prompt + resposta passem da janela do modelo."""
+    return max(0, context_window(model) - max_output_tokens - reserve)
+
+
+def fit_output(model, prompt_tokens, max_output_tokens):
+    """Limite de saída ajustado para que prompt + resposta caibam na janela (0: nem o prompt cabe)."""
+    return max(0, min(max_output_tokens, context_window(model) - prompt_tokens))